@@ -27,45 +27,19 @@ class MarketGenerator:
             print(f"Error fetching {url}: {e}")
             return None
     
-    async def get_core_data(self, session, core_type):
-        """获取指定核心的所有数据"""
+    def get_core_packages(self, core_type, versions):
+        """根据 /latest 返回的 {mc_version: build_info} 生成指定核心的包数据"""
         print(f"Processing {core_type}...")
         
-        # 获取MC版本列表
-        versions_url = f"{self.api_base_url}/core/{core_type}"
-        versions_data = await self.fetch_json(session, versions_url)
-        
-        if not versions_data or not versions_data.get('data', {}).get('versions'):
+        if not versions:
             print(f"No versions found for {core_type}")
             return []
         
-        mc_versions = versions_data['data']['versions']
         packages = []
         
-        # 为每个MC版本获取最新构建
-        for mc_version in mc_versions:  # 获取所有版本
-            builds_url = f"{self.api_base_url}/core/{core_type}/{mc_version}"
-            builds_data = await self.fetch_json(session, builds_url)
-            
-            if not builds_data or not builds_data.get('data', {}).get('builds'):
-                continue
-            
-            builds = builds_data['data']['builds']
-            if not builds:
-                continue
-            
-            # 获取最新构建的详细信息
-            latest_build = builds[0]  # 假设已按版本排序
-            build_url = f"{self.api_base_url}/core/{core_type}/{mc_version}/{latest_build}"
-            build_data = await self.fetch_json(session, build_url)
-            
-            if not build_data or not build_data.get('data'):
-                continue
-            
-            build_info = build_data['data']['build']
-            
-            # 生成包信息
-            package = self.create_package(core_type, mc_version, latest_build, build_info)
+        # 每个MC版本的最新构建 (MC版本已从新到旧排列)
+        for mc_version, build_info in versions.items():
+            package = self.create_package(core_type, mc_version, build_info['core_version'], build_info)
             if package:
                 packages.append(package)
         
@@ -182,27 +156,16 @@ class MarketGenerator:
             "path": "templates-zh.json"
         })
         
-        # 获取所有核心的包数据
+        # 一次请求获取所有核心每个MC版本的最新构建, 下载地址与单个构建接口一样改写为下载节点
         async with aiohttp.ClientSession() as session:
-            all_packages = []
-            
-            # 并发获取所有核心数据
-            tasks = []
-            for core_type in available_downloads:
-                task = asyncio.create_task(self.get_core_data(session, core_type))
-                tasks.append(task)
-            
-            # 等待所有任务完成
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # 收集所有包数据
-            for result in results:
-                if isinstance(result, list):
-                    all_packages.extend(result)
-                elif isinstance(result, Exception):
-                    print(f"Task failed with exception: {result}")
-            
-            self.market_data["packages"] = all_packages
+            latest_data = await self.fetch_json(session, f"{self.api_base_url}/latest?nodes=true")
+        
+        latest = ((latest_data or {}).get('data') or {}).get('latest', {})
+        all_packages = []
+        for core_type in available_downloads:
+            all_packages.extend(self.get_core_packages(core_type, latest.get(core_type, {})))
+        
+        self.market_data["packages"] = all_packages
         
         print(f"Generated {len(all_packages)} packages for {len(available_downloads)} cores")
         return self.market_data
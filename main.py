@@ -18,7 +18,7 @@ from src.handler import (
     geysermc_runner,
     vanilla_runner,
 )
-from src.utils import SyncLogger, init_settings, read_settings, argument_parser
+from src.utils import SyncLogger, init_settings, read_settings, argument_parser, close_session, BuildDigests, JenkinsCISerializer, FillProjectList, GitHubReleaseSerializer
 from src import __version__
 from src.api import start_production_server
 import sys
@@ -87,8 +87,12 @@ async def update_default():
         asyncio.create_task(geysermc_runner()),
         asyncio.create_task(vanilla_runner()),
     ]
-    for task in tasks:
-        await task
+    try:
+        for task in tasks:
+            await task
+    finally:
+        await close_session()
+        BuildDigests().report()
 
 
 if __name__ == "__main__":
@@ -105,11 +109,25 @@ if __name__ == "__main__":
         print(__version__)
     if args.core_list:
         SyncLogger.success(available_core)
+    if args.full_reconcile:
+        JenkinsCISerializer.full_reconcile = True
+        FillProjectList.full_reconcile = True
+        GitHubReleaseSerializer.full_reconcile = True
     if args.update:
         asyncio.run(update_default())
     if args.optimize:
         from src.utils import optimize_core_data
         asyncio.run(optimize_core_data())
+    if args.migrate:
+        from src.utils import migrate_database
+        migrate_database("runtime")
+        migrate_database("production")
+    if args.promote:
+        from src.utils import promote_database
+        promote_database()
+    if args.rollback:
+        from src.utils import rollback_database
+        rollback_database()
     if args.add_node:
         from src.utils import add_node
         add_node(args.add_node)
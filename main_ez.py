@@ -14,7 +14,7 @@ from src.handler import (
     luminol_runner,
     geysermc_runner,
 )
-from src.utils import SyncLogger, init_settings, read_settings, argument_parser
+from src.utils import SyncLogger, init_settings, read_settings, argument_parser, close_session, BuildDigests, JenkinsCISerializer, FillProjectList, GitHubReleaseSerializer
 from src import __version__
 from src.api import start_production_server
 import sys
@@ -82,8 +82,12 @@ async def update_default():
         asyncio.create_task(luminol_runner()),
         asyncio.create_task(geysermc_runner()),
     ]
-    for task in tasks:
-        await task
+    try:
+        for task in tasks:
+            await task
+    finally:
+        await close_session()
+        BuildDigests().report()
 
 
 if __name__ == "__main__":
@@ -100,6 +104,10 @@ if __name__ == "__main__":
         print(__version__)
     if args.core_list:
         SyncLogger.success(available_core)
+    if args.full_reconcile:
+        JenkinsCISerializer.full_reconcile = True
+        FillProjectList.full_reconcile = True
+        GitHubReleaseSerializer.full_reconcile = True
     if args.update:
         asyncio.run(update_default())
     if args.optimize:
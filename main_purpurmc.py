@@ -1,6 +1,6 @@
 import asyncio
 from src.handler import purpurmc_runner
-from src.utils import SyncLogger, init_settings, read_settings, argument_parser
+from src.utils import SyncLogger, init_settings, read_settings, argument_parser, close_session, BuildDigests, GitHubReleaseSerializer, JenkinsCISerializer, FillProjectList
 from src import __version__
 from src.api import start_production_server
 import sys
@@ -56,8 +56,12 @@ async def update_default():
     tasks = [
         asyncio.create_task(purpurmc_runner()),
     ]
-    for task in tasks:
-        await task
+    try:
+        for task in tasks:
+            await task
+    finally:
+        await close_session()
+        BuildDigests().report()
 
 
 if __name__ == "__main__":
@@ -74,6 +78,10 @@ if __name__ == "__main__":
         print(__version__)
     if args.core_list:
         SyncLogger.success(available_core)
+    if args.full_reconcile:
+        JenkinsCISerializer.full_reconcile = True
+        FillProjectList.full_reconcile = True
+        GitHubReleaseSerializer.full_reconcile = True
     if args.update:
         asyncio.run(update_default())
     if args.optimize:
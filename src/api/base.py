@@ -1,9 +1,15 @@
-from quart import Quart, request
+from asyncio import Semaphore, gather, get_running_loop
+from hashlib import blake2b
+from quart import Quart, make_response, request
 from werkzeug.exceptions import HTTPException
-from ..utils import __version__, cfg, get_available_node, get_alist_file_url
+from ..utils import __version__, cfg, SyncLogger, get_available_node, get_alist_file_url, QueryExecutor
+from ..utils.database import MissingDatabase, ProductionUnavailable
 
 import uvicorn
-from .model import gen_response
+from orjson import dumps
+from .cache import ResponseCache
+from .compression import ENCODERS, compress_variants, negotiate
+from .model import gen_response, dump_response, send_response
 
 sync_api = Quart(__name__)
 
@@ -26,6 +32,32 @@ def start_production_server():
     )
 
 
+def get_database_type() -> str:
+    # ?runtime=false / 0 / no 读取已发布的 production 快照, 默认读取 runtime
+    is_runtime = request.args.get("runtime", "true").lower() not in ("false", "0", "no")
+    return "runtime" if is_runtime else "production"
+
+
+@sync_api.after_serving
+async def close_database():
+    QueryExecutor().close()
+    stats = ResponseCache().stats()
+    SyncLogger.info(
+        f"API | Response cache: {stats['hits']} hits, {stats['misses']} misses, {stats['invalidated']} invalidated"
+    )
+
+
+@sync_api.errorhandler(ProductionUnavailable)
+async def production_unavailable_handler(exc):
+    # ?runtime=false 但还没有可用的 production 数据库
+    return await gen_response(status_code=503, msg=f"Error: {exc}")
+
+
+@sync_api.errorhandler(MissingDatabase)
+async def missing_database_handler(exc):
+    return await gen_response(status_code=404, msg="Error: No data were found.")
+
+
 @sync_api.errorhandler(Exception)
 async def exception_handler(exc):
     status_code = 500
@@ -65,16 +97,21 @@ async def base_dir():
 @sync_api.route("/public/statistics/")
 async def get_app_info():
     (no_secret_cfg := cfg.copy()).pop("secret_key")
-    return await gen_response(
+    no_secret_cfg.pop("github_token", None)
+    resp = await gen_response(
         data={
             "name": "MCSL-Sync",
             "author": "MCSLTeam",
             "version": f"v{__version__}",
             "config": no_secret_cfg,
+            "database": QueryExecutor().stats(),
+            "response_cache": ResponseCache().stats(),
         },
         status_code=200,
         msg="Success!",
     )
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
 
 
 @sync_api.route("/core")
@@ -82,11 +119,82 @@ async def get_app_info():
 async def get_core():
     from ..utils import available_downloads
 
-    resp = await gen_response(
-        data=available_downloads, status_code=200, msg="Success!"
+    async def render():
+        return 200, available_downloads, "Success!"
+
+    # 核心列表只随版本更新变化
+    return await cached_response(("core",), (__version__,), render)
+
+
+def make_etag(key: tuple, token: tuple | None) -> str:
+    """由路由参数与数据库标识生成, 无需读取数据库"""
+    return blake2b(repr((key, token)).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def set_cache_headers(response, etag: str, weak: bool = False):
+    response.set_etag(etag, weak=weak)
+    response.headers["Cache-Control"] = f"public, max-age={int(cfg.get('cache_max_age', 60))}"
+    return response
+
+
+async def not_modified(etag: str, weak: bool = False):
+    """If-None-Match 命中 (任一压缩编码的 ETag) 时返回 304, 否则返回 None"""
+    for candidate in (etag, *(f"{etag}-{encoding}" for encoding in ENCODERS)):
+        if request.if_none_match.contains_weak(candidate):
+            response = set_cache_headers(await make_response(b"", 304), candidate, weak)
+            response.vary.add("Accept-Encoding")
+            return response
+    return None
+
+
+async def cached_response(key: tuple, token: tuple | None, render):
+    """命中时直接发送缓存的响应, 否则由 render 返回 (status_code, data, msg) 并缓存序列化结果"""
+    etag = make_etag(key, token)
+    if (response := await not_modified(etag)) is not None:
+        return response
+    cache = ResponseCache()
+    cached = cache.get(key, token)
+    if cached is None:
+        status_code, data, msg = await render()
+        body = dump_response(status_code=status_code, data=data, msg=msg)
+        # 每个数据版本只压缩一次, 在线程中执行以免阻塞事件循环
+        variants = (
+            await get_running_loop().run_in_executor(None, compress_variants, body)
+            if status_code == 200
+            else {}
+        )
+        cached = (body, status_code, variants)
+        cache.put(key, token, cached)
+    body, status_code, variants = cached
+    encoding = negotiate(
+        request.headers.get("Accept-Encoding", ""),
+        [encoding for encoding in ENCODERS if encoding in variants],
     )
-    del available_downloads
-    return resp
+    response = await send_response(variants[encoding] if encoding else body, status_code)
+    if status_code != 200:
+        return response
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+        etag = f"{etag}-{encoding}"
+    return set_cache_headers(response, etag)
+
+
+def core_available(database_type: str, core_type: str) -> bool:
+    from ..utils.database import database_path
+
+    try:
+        database_path(database_type, core_type)
+    except MissingDatabase:
+        return False
+    return True
+
+
+def core_token(database_type: str, core_type: str) -> tuple | None:
+    from ..utils import available_downloads, database_token
+
+    # 未知核心的 404 响应与数据库无关
+    return database_token(database_type, core_type) if core_type in available_downloads else None
 
 
 @sync_api.route("/core/<core_type>")
@@ -94,73 +202,68 @@ async def get_core():
 async def get_mc_versions(core_type: str = ""):
     from ..utils import get_mc_versions, available_downloads
 
-    is_runtime = request.args.get("runtime", True)
-    database_type = "runtime" if is_runtime else "production"
+    database_type = get_database_type()
 
-    database_data = (
-        await get_mc_versions(
+    async def render():
+        if core_type not in available_downloads:
+            return 404, None, "Error: No data were found."
+        database_data = await get_mc_versions(
             database_type=database_type,
             core_type=core_type,
         )
-        if core_type in available_downloads
-        else None
-    )
+        return 200, {"type": database_type, "versions": database_data}, "Success!"
 
-    resp = await gen_response(
-        data={"type": database_type, "versions": database_data}
-        if core_type in available_downloads
-        else None,
-        status_code=200 if core_type in available_downloads else 404,
-        msg=(
-            "Success!"
-            if core_type in available_downloads
-            else "Error: No data were found."
-        ),
+    return await cached_response(
+        ("versions", database_type, core_type),
+        core_token(database_type, core_type),
+        render,
     )
-    del get_mc_versions, is_runtime, database_type, database_data
-    return resp
 
 
 @sync_api.route("/core/<core_type>/<mc_version>")
 @sync_api.route("/core/<core_type>/<mc_version>/")
 async def get_core_versions(core_type: str = "", mc_version: str = ""):
-    from ..utils import get_mc_versions, get_core_versions, available_downloads
+    from ..utils import get_core_versions, available_downloads
 
-    is_runtime = request.args.get("runtime", True)
-    database_type = "runtime" if is_runtime else "production"
-    versions_list = (
-        await get_mc_versions(
-            database_type=database_type,
-            core_type=core_type,
-        )
-        if core_type in available_downloads
-        else []
-    )
-    database_data = (
-        await get_core_versions(
-            database_type=database_type,
-            core_type=core_type,
-            mc_version=mc_version,
+    database_type = get_database_type()
+
+    async def render():
+        # mc_version 不存在时查询结果为空, 无需先获取版本列表
+        database_data = (
+            await get_core_versions(
+                database_type=database_type,
+                core_type=core_type,
+                mc_version=mc_version,
+            )
+            if core_type in available_downloads
+            else []
         )
-        if mc_version in versions_list
-        else []
-    )
-    resp = await gen_response(
-        data={"type": database_type, "builds": database_data}
-        if mc_version in versions_list
-        else None,
-        status_code=200 if mc_version in versions_list else 404,
-        msg="Success!" if mc_version in versions_list else "Error: No data were found.",
-    )
-    del (
-        get_core_versions,
-        get_mc_versions,
-        is_runtime,
-        database_type,
-        database_data,
-        versions_list,
+        if not database_data:
+            return 404, None, "Error: No data were found."
+        return 200, {"type": database_type, "builds": database_data}, "Success!"
+
+    return await cached_response(
+        ("builds", database_type, core_type, mc_version),
+        core_token(database_type, core_type),
+        render,
     )
-    return resp
+
+
+# 这些核心直接使用上游下载地址, 不改写为下载节点
+NODE_EXEMPT_CORES = frozenset(("Mohist", "Banner", "Purpur", "Purformance"))
+
+
+async def rewrite_download_url(
+    download_endpoint, core_type: str, mc_version: str, core_version: str, build: dict
+) -> None:
+    """将 build 的下载地址改写为 download_endpoint 节点上的地址"""
+    if download_endpoint == "error":
+        return
+    if download_endpoint.get("type") == "nodeside":
+        build["download_url"] = f"{download_endpoint.get("endpoint")}core/{core_type}/{mc_version}/{core_version}/download"
+    elif download_endpoint.get("type") == "alist":
+        # build["download_url"] = f"{download_endpoint.get("endpoint")}/{core_type}/{mc_version}/{core_version}"
+        build["download_url"] = await get_alist_file_url(host=download_endpoint.get("endpoint"), path=f"{download_endpoint.get("alist_subpath")}/{core_type}/{mc_version}/{core_type}-{mc_version}-{core_version}.jar")
 
 
 @sync_api.route("/core/<core_type>/<mc_version>/<core_version>")
@@ -169,68 +272,199 @@ async def get_specified_core(
     core_type: str = "", mc_version: str = "", core_version: str = ""
 ):
     from ..utils import (
-        get_mc_versions,
-        get_core_versions,
         available_downloads,
         get_specified_core_data,
     )
 
-    is_runtime = request.args.get("runtime", True)
-    database_type = "runtime" if is_runtime else "production"
-    mc_versions_list = (
-        await get_mc_versions(
-            database_type=database_type,
-            core_type=core_type,
-        )
-        if core_type in available_downloads
-        else []
-    )
-    core_versions_list = (
-        await get_core_versions(
-            database_type=database_type,
-            core_type=core_type,
-            mc_version=mc_version,
+    database_type = get_database_type()
+    # 下载节点每次请求随机选择, 因此只缓存查询结果, 响应在改写下载地址后再序列化
+    key = ("build", database_type, core_type, mc_version, core_version)
+    token = core_token(database_type, core_type)
+    # 不同请求的下载节点可能不同, 内容仅在语义上等价, 因此使用弱 ETag
+    etag = make_etag(key, token)
+    if (resp := await not_modified(etag, weak=True)) is not None:
+        return resp
+    cached = ResponseCache().get(key, token)
+    if cached is None:
+        cached = (
+            await get_specified_core_data(
+                database_type=database_type,
+                core_type=core_type,
+                mc_version=mc_version,
+                core_version=core_version,
+            )
+            if core_type in available_downloads
+            else {}
         )
-        if mc_version in mc_versions_list
-        else []
-    )
-    database_data = (
-        await get_specified_core_data(
-            database_type=database_type,
-            core_type=core_type,
-            mc_version=mc_version,
-            core_version=core_version,
+        ResponseCache().put(key, token, cached)
+    if not cached:
+        # 唯一索引上的单次查找未命中, 直接返回 404
+        return await gen_response(status_code=404, msg="Error: No data were found.")
+    database_data = dict(cached)
+    if core_type not in NODE_EXEMPT_CORES:
+        await rewrite_download_url(
+            await get_available_node(), core_type, mc_version, core_version, database_data
         )
-        if core_version in core_versions_list
-        else {}
-    )
-    if database_data:
-        if core_type != "Mohist" and core_type != "Banner" and core_type != "Purpur" and core_type != "Purformance":
-            download_endpoint = await get_available_node()
-            if download_endpoint != "error":
-                if download_endpoint.get("type") == "nodeside":
-                    database_data["download_url"] = f"{download_endpoint.get("endpoint")}core/{core_type}/{mc_version}/{core_version}/download"
-                elif download_endpoint.get("type") == "alist":
-                    # database_data["download_url"] = f"{download_endpoint.get("endpoint")}/{core_type}/{mc_version}/{core_version}"
-                    database_data["download_url"] = await get_alist_file_url(host=download_endpoint.get("endpoint"), path=f"{download_endpoint.get("alist_subpath")}/{core_type}/{mc_version}/{core_type}-{mc_version}-{core_version}.jar")
     resp = await gen_response(
-        data={"type": database_type, "build": database_data}
-        if core_version in core_versions_list
-        else None,
-        status_code=200 if core_version in core_versions_list else 404,
-        msg=(
-            "Success!"
-            if core_version in core_versions_list
-            else "Error: No data were found."
-        ),
+        data={"type": database_type, "build": database_data},
+        status_code=200,
+        msg="Success!",
     )
     del (
-        get_core_versions,
-        get_mc_versions,
-        is_runtime,
+        get_specified_core_data,
         database_type,
         database_data,
-        mc_versions_list,
     )
-    return resp
+    return set_cache_headers(resp, etag, weak=True)
+
+
+
+@sync_api.route("/latest")
+@sync_api.route("/latest/")
+@sync_api.route("/latest/<core_type>")
+@sync_api.route("/latest/<core_type>/")
+async def get_latest(core_type: str | None = None):
+    """
+    每个核心每个 MC 版本最新的构建, 默认返回上游下载地址
+    ?mc_version= 只返回该 MC 版本下各核心最新的构建
+    ?nodes=true 时与 /core/<core_type>/<mc_version>/<core_version> 一样改写为下载节点地址
+    """
+    from ..utils import available_downloads, database_token, get_latest_builds, get_latest_matrix
+    from ..utils.database import use_catalog
 
+    database_type = get_database_type()
+    mc_version = request.args.get("mc_version") or None
+    if core_type is not None:
+        token = core_token(database_type, core_type)
+    elif use_catalog():
+        token = database_token(database_type, "")
+    else:
+        token = tuple(
+            database_token(database_type, core) if core_available(database_type, core) else None
+            for core in available_downloads
+        )
+
+    async def load_matrix() -> dict[str, dict[str, dict]]:
+        if mc_version is None:
+            return await get_latest_matrix(database_type, core_type)
+        if core_type is not None:
+            versions = (await get_latest_matrix(database_type, core_type)).get(core_type, {})
+            return {core_type: {mc_version: versions[mc_version]}} if mc_version in versions else {}
+        # 所有核心: 启用 catalog 时为单条查询
+        return {
+            build["core_type"]: {
+                mc_version: {
+                    "core_version": build["core_version"],
+                    "download_url": build["download_url"],
+                    "sync_time": build["sync_time"],
+                }
+            }
+            for build in await get_latest_builds(database_type, mc_version)
+        }
+
+    async def render():
+        if core_type is not None and core_type not in available_downloads:
+            return 404, None, "Error: No data were found."
+        return 200, {"type": database_type, "latest": await load_matrix()}, "Success!"
+
+    if request.args.get("nodes", "false").lower() not in ("true", "1", "yes"):
+        return await cached_response(
+            ("latest", database_type, core_type, mc_version), token, render
+        )
+
+    # 下载节点每次请求随机选择, 只缓存矩阵本身, 与单个构建的路由一致使用弱 ETag
+    key = ("latest-nodes", database_type, core_type, mc_version)
+    etag = make_etag(key, token)
+    if (resp := await not_modified(etag, weak=True)) is not None:
+        return resp
+    if core_type is not None and core_type not in available_downloads:
+        return await gen_response(status_code=404, msg="Error: No data were found.")
+    matrix = ResponseCache().get(key, token)
+    if matrix is None:
+        matrix = await load_matrix()
+        ResponseCache().put(key, token, matrix)
+    download_endpoint = await get_available_node()
+    # alist 节点需要逐个查询文件地址, 限制并发
+    semaphore = Semaphore(16)
+
+    async def rewrite(core: str, mc_version: str, build: dict) -> None:
+        async with semaphore:
+            await rewrite_download_url(
+                download_endpoint, core, mc_version, build["core_version"], build
+            )
+
+    rewritten = {}
+    tasks = []
+    for core, versions in matrix.items():
+        rewritten[core] = {}
+        for mc_version, build in versions.items():
+            rewritten[core][mc_version] = build = dict(build)
+            if core not in NODE_EXEMPT_CORES:
+                tasks.append(rewrite(core, mc_version, build))
+    await gather(*tasks)
+    resp = await gen_response(
+        data={"type": database_type, "latest": rewritten},
+        status_code=200,
+        msg="Success!",
+    )
+    return set_cache_headers(resp, etag, weak=True)
+
+
+@sync_api.route("/changes")
+@sync_api.route("/changes/")
+@sync_api.route("/changes/<core_type>")
+@sync_api.route("/changes/<core_type>/")
+async def get_changes(core_type: str | None = None):
+    """
+    以 NDJSON 流式返回 seq 大于 since 的变更, 每行一条
+    不指定 core_type 时需要启用 catalog (各核心独立的数据库 seq 互不相关)
+    """
+    from ..utils import available_downloads, get_changes, database_token
+    from ..utils.database import use_catalog
+
+    if core_type is not None and core_type not in available_downloads:
+        return await gen_response(status_code=404, msg="Error: No data were found.")
+    if core_type is None and not use_catalog():
+        return await gen_response(
+            status_code=400,
+            msg="Error: Sequence numbers are per core, use /changes/<core_type>.",
+        )
+    try:
+        since = max(int(request.args.get("since", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 10000)), 1), 10000)
+    except ValueError:
+        return await gen_response(status_code=400, msg="Error: Invalid since or limit.")
+
+    database_type = get_database_type()
+    etag = make_etag(
+        ("changes", database_type, core_type, since, limit),
+        database_token(database_type, core_type or ""),
+    )
+    if (resp := await not_modified(etag)) is not None:
+        return resp
+    page_size = min(limit, 500)
+    rows, trimmed = await get_changes(database_type, core_type, since, page_size)
+    if since < trimmed:
+        # 所需的变更已被清理, 消费者需要全量同步后从最新 seq 继续
+        return await gen_response(
+            status_code=410,
+            data={"trimmed_seq": trimmed},
+            msg="Error: Changes before this sequence were trimmed, resync required.",
+        )
+
+    async def stream():
+        nonlocal rows
+        sent = 0
+        while rows:
+            yield b"".join(dumps(row) + b"\n" for row in rows)
+            sent += len(rows)
+            if len(rows) < page_size or sent >= limit:
+                return
+            rows, _ = await get_changes(
+                database_type, core_type, rows[-1]["seq"], min(page_size, limit - sent)
+            )
+
+    return set_cache_headers(
+        await make_response(stream(), 200, {"Content-Type": "application/x-ndjson"}),
+        etag,
+    )
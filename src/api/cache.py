@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from ..utils import cfg
+from ..utils.decorators import Singleton
+
+
+@Singleton
+class ResponseCache(object):
+    """
+    /core 路由的响应缓存, 保存已序列化的响应
+    每个条目记录生成时的数据库标识, 标识变化 (同步写入 / 发布新快照) 后条目失效
+    路由参数来自请求路径, 因此按最近使用淘汰以限制条目数
+    """
+
+    def __init__(self) -> None:
+        self.max_entries = int(cfg.get("response_cache_entries", 4096))
+        self.entries: OrderedDict[tuple, tuple[tuple | None, object]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.invalidated: int = 0
+
+    def get(self, key: tuple, token: tuple | None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != token:
+            del self.entries[key]
+            self.invalidated += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: tuple, token: tuple | None, value) -> None:
+        self.entries[key] = (token, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+        }
@@ -0,0 +1,65 @@
+import gzip
+from ..utils import cfg
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _encoders() -> dict:
+    # 按优先级排列, 客户端给出相同 q 值时选择靠前的编码
+    encoders = {}
+    if zstandard is not None:
+        encoders["zstd"] = lambda body: zstandard.ZstdCompressor(level=19).compress(body)
+    if brotli is not None:
+        encoders["br"] = lambda body: brotli.compress(body, quality=11)
+    encoders["gzip"] = lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    return encoders
+
+
+ENCODERS = _encoders()
+
+
+def min_size() -> int:
+    return int(cfg.get("compression_min_size", 1024))
+
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    """预先压缩所有可用编码, 压缩后没有变小的编码不保留"""
+    if len(body) < min_size():
+        return {}
+    variants = {}
+    for encoding, encoder in ENCODERS.items():
+        compressed = encoder(body)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def negotiate(accept_encoding: str, available) -> str | None:
+    """按 Accept-Encoding 的 q 值在 available 中选择编码, 没有可用编码时返回 None"""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding] = quality
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -3,21 +3,33 @@ from typing import Union
 from orjson import dumps
 
 
-async def gen_response(
+def dump_response(
     *,
     status_code=200,
     data: Union[list, dict, str] = None,
     msg: str = "Ok",
-):
-    response = await make_response(
-        dumps(
-            {
-                "data": data,
-                "code": status_code,
-                "msg": msg,
-            },
-        ),
-        status_code,
+) -> bytes:
+    return dumps(
+        {
+            "data": data,
+            "code": status_code,
+            "msg": msg,
+        },
     )
+
+
+async def send_response(body: bytes, status_code: int = 200):
+    response = await make_response(body, status_code)
     response.mimetype = "application/json"
     return response
+
+
+async def gen_response(
+    *,
+    status_code=200,
+    data: Union[list, dict, str] = None,
+    msg: str = "Ok",
+):
+    return await send_response(
+        dump_response(status_code=status_code, data=data, msg=msg), status_code
+    )
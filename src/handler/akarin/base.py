@@ -3,7 +3,7 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 class AkarinReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="Akarin-project", repo="Akarin")
+        super().__init__(owner="Akarin-project", repo="Akarin", core_type="Akarin")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
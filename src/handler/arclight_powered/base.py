@@ -3,7 +3,7 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 class ArclightReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="IzzelAliz", repo="Arclight")
+        super().__init__(owner="IzzelAliz", repo="Arclight", core_type="Arclight")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -36,7 +36,7 @@ class ArclightReleaseSerializer(GitHubReleaseSerializer):
 
 class LightfallReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="ArclightPowered", repo="lightfall")
+        super().__init__(owner="ArclightPowered", repo="lightfall", core_type="Lightfall")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -68,7 +68,7 @@ class LightfallReleaseSerializer(GitHubReleaseSerializer):
 
 class LightfallClientReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="ArclightPowered", repo="lightfall-client")
+        super().__init__(owner="ArclightPowered", repo="lightfall-client", core_type="LightfallClient")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -2,8 +2,11 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 
 class CatServerReleaseSerializer(GitHubReleaseSerializer):
+    # mc_version 取自 target_commitish, GraphQL 不提供该字段
+    graphql = False
+
     def __init__(self) -> None:
-        super().__init__(owner="Luohuayu", repo="CatServer")
+        super().__init__(owner="Luohuayu", repo="CatServer", core_type="CatServer")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -3,7 +3,7 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 class ContigoReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="djoveryde", repo="Contigo")
+        super().__init__(owner="djoveryde", repo="Contigo", core_type="Contigo")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
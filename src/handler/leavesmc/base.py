@@ -3,7 +3,7 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 class LeavesReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="LeavesMC", repo="Leaves")
+        super().__init__(owner="LeavesMC", repo="Leaves", core_type="Leaves")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
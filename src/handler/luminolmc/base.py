@@ -2,8 +2,11 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 
 class LuminolReleaseSerializer(GitHubReleaseSerializer):
+    # core_version 按发布顺序编号, 需要完整的发布历史
+    incremental = False
+
     def __init__(self) -> None:
-        super().__init__(owner="LuminolMC", repo="Luminol")
+        super().__init__(owner="LuminolMC", repo="Luminol", core_type="Luminol")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -29,8 +32,10 @@ class LuminolReleaseSerializer(GitHubReleaseSerializer):
 
 
 class LightingLuminolReleaseSerializer(GitHubReleaseSerializer):
+    incremental = False
+
     def __init__(self) -> None:
-        super().__init__(owner="LuminolMC", repo="LightingLuminol")
+        super().__init__(owner="LuminolMC", repo="LightingLuminol", core_type="LightingLuminol")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
@@ -9,14 +9,12 @@ class _ProjectList(object):
         self.project_id_list: list = []
         self.project_list: list = []
 
-    async def load_self(self, retry: int = 0) -> None:
+    async def load_self(self) -> None:
         # fmt: off
-        if retry:
-            SyncLogger.warning("MohistMC | Retrying getting project list...")
         self.project_id_list = await get_json("https://mohistmc.com/api/v2/projects/")  # noqa: E501
-        if self.project_id_list is None:
+        if not isinstance(self.project_id_list, list):
             SyncLogger.error("MohistMC | Project list load failed!")
-            return self.load_self(retry=(retry+1))
+            self.project_id_list = []
         # fmt: on
 
     async def load_all_projects(self) -> None:
@@ -54,16 +52,16 @@ class Project(object):
         self.version_label_list: list = []
         self.versions: list[SingleVersion] = []
 
-    async def load_self(self, retry: int = 0) -> None:
-        if retry:
-            SyncLogger.warning("{project_id} | Retrying getting project info...")
+    async def load_self(self) -> None:
         tmp_data = await get_json(
             "https://mohistmc.com/api/v2/projects/{project_id}/".format(
                 project_id=self.project_id
             )
         )  # type: dict
 
-        self.version_label_list = tmp_data.get("versions", None)
+        self.version_label_list = (
+            tmp_data.get("versions", None) if isinstance(tmp_data, dict) else None
+        )
 
         if self.version_label_list is None:
             SyncLogger.error(
@@ -71,7 +69,7 @@ class Project(object):
                     project_id=self.project_id.capitalize()
                 )
             )
-            return self.load_self(retry=(retry + 1))
+            return
         await self.load_version_list()
 
     async def load_version_list(self) -> None:
@@ -113,18 +111,17 @@ class SingleVersion(object):
         self.project_name: str = project_name
         self.version: str = version
         self.builds_list: list = []
+        self.builds: list = []
 
-    async def load_self(self, retry: int = 0) -> None:
-        if retry:
-            SyncLogger.warning(
-                "{project_id} | {version} | Retrying getting version info..."
-            )
+    async def load_self(self) -> None:
         tmp_data = await get_json(
             "https://mohistmc.com/api/v2/projects/{project_id}/{version}/builds".format(
                 project_id=self.project_id, version=self.version
             )
         )
-        self.builds_list: list = tmp_data.get("builds", None)
+        self.builds_list: list = (
+            tmp_data.get("builds", None) if isinstance(tmp_data, dict) else None
+        )
 
         if self.builds_list is None:
             SyncLogger.error(
@@ -132,7 +129,7 @@ class SingleVersion(object):
                     project_id=self.project_id.capitalize(), version=self.version
                 )
             )
-            return self.load_self(retry=(retry + 1))
+            return
         await self.load_builds()
 
     async def load_builds(self) -> None:
@@ -19,7 +19,8 @@ class NukkitXCISerializer(JenkinsCISerializer):
 
     @SyncLogger.catch
     async def load_single_version(self, job: dict) -> list[dict[str, str]]:
-        tmp_data = await self.load_single_job(job_name="master")
+        watermark = await self.get_watermark(job["name"], job["url"] + "/job/master/")
+        tmp_data = await self.load_single_job(job_name="master", watermark=watermark)
         from time import strftime, localtime
         self.job_data["general"] = []
         for single_data in tmp_data:
@@ -27,7 +28,7 @@ class NukkitXCISerializer(JenkinsCISerializer):
                 continue
             else:
                 if len(single_data["artifacts"]):
-                    for artifact in single_data["artifacts"]:
+                    for artifact in self.server_artifacts(single_data["artifacts"]):
                         self.job_data["general"].append(
                             {
                                 "sync_time": str(
@@ -1,5 +1,12 @@
 from ...utils import JenkinsCISerializer, SyncLogger
 from asyncio import create_task
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def parse_mc_version(file_name: str) -> str:
+    """pufferfish-paperclip-1.20.4-R0.1-SNAPSHOT.jar -> 1.20.4"""
+    return file_name.replace("paperclip-", "").removesuffix(".jar").split("-")[1]
 
 
 class PufferfishCISerializer(JenkinsCISerializer):
@@ -9,7 +16,7 @@ class PufferfishCISerializer(JenkinsCISerializer):
         self.job_data: dict = {}
 
     async def load(self) -> None:
-        await self.serialize_project_name(await self.get_jobs())
+        await self.serialize_project_name(await self.get_jobs_with_builds())
 
     async def serialize_project_name(self, tmp_job_list: list[str]) -> None:
         for job in tmp_job_list:
@@ -41,60 +48,50 @@ class PufferfishCISerializer(JenkinsCISerializer):
         del tasks
 
     @SyncLogger.catch
-    async def load_single_version(self, job: dict) -> list[dict[str, str]]:
-        job_name = job["url"].replace(self.end_point, "").replace("/job/", "")[:-1]
-        tmp_data = await self.load_single_job(job_name=job_name)
+    async def load_single_version(self, job: dict) -> None:
+        watermark = await self.get_watermark(job["name"], job["url"])
+        builds = job.get("builds")
+        if builds is not None and self.covers_watermark(builds, watermark):
+            tmp_data = self.filter_builds(
+                [
+                    build
+                    for build in builds
+                    if watermark is None or build["number"] > watermark
+                ]
+            )
+        else:
+            # 批量查询的窗口不足以覆盖水位, 单独拉取该 Job
+            job_name = job["url"].replace(self.end_point, "").replace("/job/", "")[:-1]
+            tmp_data = await self.load_single_job(job_name=job_name, watermark=watermark)
         from time import strftime, localtime
 
-        self.job_data[job["name"]] = {}
+        # 同名 (不同 MC 大版本) 的 Job 合并到同一个 core_type 下
+        job_data = self.job_data.setdefault(job["name"], {})
         for single_data in tmp_data:
             if not len(single_data):
                 continue
-            else:
-                for artifact in single_data["artifacts"]:
-                    self.job_data[job["name"]][
-                        str(
-                            artifact["fileName"]
-                            .replace("paperclip-", "")
-                            .removesuffix(".jar")
-                            .split("-")[1]
-                        )
-                    ] = []
-        for single_data in tmp_data:
-            if not len(single_data):
-                continue
-            else:
-                for artifact in single_data["artifacts"]:
-                    self.job_data[job["name"]][
-                        str(
-                            artifact["fileName"]
-                            .replace("paperclip-", "")
-                            .removesuffix(".jar")
-                            .split("-")[1]
-                        )
-                    ].append(
-                        {
-                            "sync_time": str(
-                                strftime(
-                                    "%Y-%m-%d %H:%M:%S",
-                                    localtime(int(single_data["timestamp"]) / 1000),
-                                )
-                            ).replace(" ", "T")
-                            + "Z",
-                            "download_url": str(
-                                job["url"]
-                                + str(single_data["number"])
-                                + "/artifact/"
-                                + artifact["relativePath"]
-                            ),
-                            "core_type": job["name"],
-                            "mc_version": str(
-                                artifact["fileName"]
-                                .replace("paperclip-", "")
-                                .removesuffix(".jar")
-                                .split("-")[1]
-                            ),
-                            "core_version": str("build" + str(single_data["number"])),
-                        }
-                    )
+            for artifact in self.server_artifacts(
+                single_data["artifacts"], key=lambda artifact: parse_mc_version(artifact["fileName"])
+            ):
+                mc_version = parse_mc_version(artifact["fileName"])
+                job_data.setdefault(mc_version, []).append(
+                    {
+                        "sync_time": str(
+                            strftime(
+                                "%Y-%m-%d %H:%M:%S",
+                                localtime(int(single_data["timestamp"]) / 1000),
+                            )
+                        ).replace(" ", "T")
+                        + "Z",
+                        "download_url": str(
+                            job["url"]
+                            + str(single_data["number"])
+                            + "/artifact/"
+                            + artifact["relativePath"]
+                        ),
+                        "core_type": job["name"],
+                        "mc_version": mc_version,
+                        "core_version": str("build" + str(single_data["number"])),
+                    }
+                )
         del strftime, localtime
@@ -8,19 +8,15 @@ class _ProjectList(object):
         self.project_id_list: list = []
         self.project_list: list = []
 
-    async def load_self(self, retry: int = 0) -> None:
+    async def load_self(self) -> None:
         # fmt: off
-        if retry:
-            SyncLogger.warning("SpongePowered | Retrying getting project list...")
         tmp_data = await get_json("https://dl-api.spongepowered.org/v2/groups/org.spongepowered/artifacts")
         if not isinstance(tmp_data, dict):
             SyncLogger.error("SpongePowered | Project list load failed (bad response)!")
-            await self.load_self(retry=(retry+1))
             return
         self.project_id_list = tmp_data.get("artifactIds", [])
         if not self.project_id_list:
             SyncLogger.error("SpongePowered | Project list is empty!")
-            await self.load_self(retry=(retry+1))
             return
         # fmt: on
 
@@ -59,11 +55,7 @@ class Project(object):
         self.version_label_list: list = []
         self.versions: list[SingleVersion] = []
 
-    async def load_self(self, retry: int = 0) -> None:
-        if retry:
-            SyncLogger.warning(
-                "{project_id} | Retrying getting project info..."
-            )
+    async def load_self(self) -> None:
         tmp_data = await get_json(
             "https://dl-api.spongepowered.org/v2/groups/org.spongepowered/artifacts/{project_id}".format(
                 project_id=self.project_id
@@ -75,7 +67,6 @@ class Project(object):
                     project_id=self.project_id.capitalize()
                 )
             )
-            await self.load_self(retry=(retry + 1))
             return
         # ensure non-None string assignment for typed attribute
         self.project_name = str(tmp_data.get("displayName") or "")
@@ -89,7 +80,6 @@ class Project(object):
                     project_id=self.project_id.capitalize()
                 )
             )
-            await self.load_self(retry=(retry + 1))
             return
         await self.load_version_list()
 
@@ -134,11 +124,7 @@ class SingleVersion(object):
         self.build_label_list: list = []
         self.builds_manager: BuildsManager | None = None
 
-    async def load_self(self, retry: int = 0) -> None:
-        if retry:
-            SyncLogger.warning(
-                "{project_id} | {version} | Retrying getting version info..."
-            )
+    async def load_self(self) -> None:
         tmp_data = await get_json(
             "https://dl-api.spongepowered.org/v2/groups/org.spongepowered/artifacts/{project_id}/versions?tags=,minecraft:{version}&offset=0&limit=10".format(
                 project_id=self.project_id, version=self.version
@@ -150,7 +136,6 @@ class SingleVersion(object):
                     project_id=self.project_id.capitalize(), version=self.version
                 )
             )
-            await self.load_self(retry=(retry + 1))
             return
 
         artifacts = tmp_data.get("artifacts", None)
@@ -168,7 +153,6 @@ class SingleVersion(object):
                     project_id=self.project_id.capitalize(), version=self.version
                 )
             )
-            await self.load_self(retry=(retry + 1))
             return
 
         self.builds_manager = BuildsManager(
@@ -3,7 +3,7 @@ from ...utils import GitHubReleaseSerializer, SyncLogger, update_database
 
 class ThermosReleaseSerializer(GitHubReleaseSerializer):
     def __init__(self) -> None:
-        super().__init__(owner="CyberdyneCC", repo="Thermos")
+        super().__init__(owner="CyberdyneCC", repo="Thermos", core_type="Thermos")
 
     async def get_assets(self) -> None:
         await self.get_release_data()
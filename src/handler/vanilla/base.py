@@ -1,5 +1,5 @@
 from datetime import datetime
-from ...utils import SyncLogger, get_json, update_database
+from ...utils import SyncLogger, get_json, get_synced_mc_versions, is_unchanged, update_database
 from ...utils.minecraft import sort_versions_descending
 
 
@@ -16,6 +16,12 @@ class VanillaLoader:
             if not manifest_data:
                 SyncLogger.error(f"{self.core_type} | Failed to fetch version manifest")
                 return
+            # 清单未变化时只补全数据库中缺少的版本 (上次写入失败或数据库被替换)
+            stored = (
+                await get_synced_mc_versions("runtime", self.core_type)
+                if is_unchanged(self.version_manifest_url)
+                else set()
+            )
             
             versions = {}
             release_versions = []
@@ -36,6 +42,8 @@ class VanillaLoader:
                 
                 if not all([version_id, release_time, version_url]):
                     continue
+                if version_id in stored:
+                    continue
                 
                 # 获取具体版本的详细信息
                 version_data = await get_json(version_url)
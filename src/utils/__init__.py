@@ -1,4 +1,4 @@
-from .network import get_proxy, get_json, get_text, check_file_exists  # noqa: F401
+from .network import get_proxy, get_json, get_text, check_file_exists, get_session, close_session, fetch, fetch_response, get_json_response, post_json, is_unchanged  # noqa: F401
 from .minecraft import MinecraftVersion  # noqa: F401
 from .decorators import Singleton  # noqa: F401
 from .logger import SyncLogger, __version__  # noqa: F401
@@ -6,6 +6,7 @@ from .downloader import Downloader  # noqa: F401
 from .settings import cfg, init_settings, read_settings, add_node, get_available_node  # noqa: F401
 from .github_releases import GitHubReleaseSerializer  # noqa: F401
 from .jenkins import JenkinsCISerializer  # noqa: F401
+from .fill import FillProjectList  # noqa: F401
 from .arg_parser import argument_parser  # noqa: F401
 from .alist import get_alist_file_url  # noqa: F401
-from .database import optimize_core_data, available_downloads, update_database, get_mc_versions, get_core_versions, get_specified_core_data  # noqa: F401
+from .database import optimize_core_data, available_downloads, update_database, BuildDigests, get_mc_versions, get_core_versions, get_specified_core_data, get_latest_sync_time, get_synced_mc_versions, get_latest_build_number, get_latest_builds, get_latest_matrix, get_changes, database_token, migrate_database, promote_database, rollback_database, ReadConnections, QueryExecutor  # noqa: F401
@@ -44,6 +44,31 @@ argument_parser.add_argument(
     action="store_true",
     default=False,
 )
+argument_parser.add_argument(
+    "-m",
+    "--migrate",
+    help="Migrate databases to the current schema",
+    action="store_true",
+    default=False,
+)
+argument_parser.add_argument(
+    "--promote",
+    help="Snapshot runtime databases into a new production generation",
+    action="store_true",
+    default=False,
+)
+argument_parser.add_argument(
+    "--rollback",
+    help="Switch production back to the previous generation",
+    action="store_true",
+    default=False,
+)
+argument_parser.add_argument(
+    "--full-reconcile",
+    help="Ignore incremental watermarks and resync full build history (Jenkins, PaperMC, GeyserMC, GitHub releases)",
+    action="store_true",
+    default=False,
+)
 argument_parser.add_argument(
     "-n",
     "--add-node",
@@ -1,6 +1,19 @@
 import sqlite3
+from asyncio import get_running_loop
+from calendar import timegm
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from hashlib import sha256
+from contextlib import closing
+from os import listdir, makedirs, replace, stat
+from os.path import dirname, exists
+from shutil import rmtree
+from threading import Lock, local
+from time import gmtime, perf_counter, strftime, time
 from .logger import SyncLogger
-from .minecraft import sort_versions_descending
+from .decorators import Singleton
+from .minecraft import natural_sort_key
 
 available_downloads = [
     "Arclight",
@@ -39,156 +52,963 @@ available_downloads = [
 ]
 
 
+# PRAGMA user_version: 0 为旧版 "每个 MC 版本一张表" 的布局
+# 2 增加了跨核心查询的索引, 3 增加了写入时计算的版本排序键, 4 增加了变更日志, 5 增加了构建集合摘要
+# 6 增加了最新构建索引, 7 修正了预发布版本的排序键 (需要重新计算)
+SCHEMA_VERSION = 7
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    core_type TEXT NOT NULL,
+    mc_version TEXT NOT NULL,
+    core_version TEXT NOT NULL,
+    download_url TEXT NOT NULL,
+    sync_time INTEGER NOT NULL DEFAULT 0,
+    mc_version_key TEXT,
+    core_version_key TEXT,
+    UNIQUE (core_type, mc_version, core_version)
+);
+"""
+SCHEMA_INDEXES = """
+CREATE INDEX IF NOT EXISTS builds_sync_time ON builds (core_type, sync_time);
+CREATE INDEX IF NOT EXISTS builds_mc_version ON builds (mc_version, core_type, sync_time);
+CREATE INDEX IF NOT EXISTS builds_mc_order ON builds (core_type, mc_version_key, mc_version);
+CREATE INDEX IF NOT EXISTS builds_core_order ON builds (core_type, mc_version, core_version_key, core_version);
+CREATE TABLE IF NOT EXISTS build_digests (
+    core_type TEXT NOT NULL,
+    mc_version TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (core_type, mc_version)
+) WITHOUT ROWID;
+"""
+# builds 的每次插入 / 更新 / 删除由触发器追加到 changes, seq 单调递增且不会复用
+CHANGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    core_type TEXT NOT NULL,
+    mc_version TEXT NOT NULL,
+    core_version TEXT NOT NULL,
+    download_url TEXT,
+    sync_time INTEGER,
+    changed_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_core_type ON changes (core_type, seq);
+CREATE INDEX IF NOT EXISTS changes_changed_at ON changes (changed_at);
+CREATE TRIGGER IF NOT EXISTS builds_insert AFTER INSERT ON builds BEGIN
+    INSERT INTO changes (operation, core_type, mc_version, core_version, download_url, sync_time, changed_at)
+    VALUES ('insert', NEW.core_type, NEW.mc_version, NEW.core_version, NEW.download_url, NEW.sync_time, CAST(strftime('%s', 'now') AS INTEGER));
+END;
+CREATE TRIGGER IF NOT EXISTS builds_update AFTER UPDATE OF sync_time, download_url ON builds BEGIN
+    INSERT INTO changes (operation, core_type, mc_version, core_version, download_url, sync_time, changed_at)
+    VALUES ('update', NEW.core_type, NEW.mc_version, NEW.core_version, NEW.download_url, NEW.sync_time, CAST(strftime('%s', 'now') AS INTEGER));
+END;
+CREATE TRIGGER IF NOT EXISTS builds_delete AFTER DELETE ON builds BEGIN
+    INSERT INTO changes (operation, core_type, mc_version, core_version, changed_at)
+    VALUES ('delete', OLD.core_type, OLD.mc_version, OLD.core_version, CAST(strftime('%s', 'now') AS INTEGER));
+END;
+"""
+# 每个 (core_type, mc_version) 最新的构建 (与 /core/<core_type>/<mc_version> 的首项一致), 由触发器维护
+LATEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest_builds (
+    core_type TEXT NOT NULL,
+    mc_version TEXT NOT NULL,
+    core_version TEXT NOT NULL,
+    download_url TEXT NOT NULL,
+    sync_time INTEGER NOT NULL,
+    mc_version_key TEXT,
+    PRIMARY KEY (core_type, mc_version)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS latest_insert AFTER INSERT ON builds BEGIN
+    DELETE FROM latest_builds WHERE core_type = NEW.core_type AND mc_version = NEW.mc_version;
+    INSERT INTO latest_builds (core_type, mc_version, core_version, download_url, sync_time, mc_version_key)
+    SELECT core_type, mc_version, core_version, download_url, sync_time, mc_version_key FROM builds
+    WHERE core_type = NEW.core_type AND mc_version = NEW.mc_version
+    ORDER BY core_version_key DESC, core_version DESC LIMIT 1;
+END;
+CREATE TRIGGER IF NOT EXISTS latest_update AFTER UPDATE OF sync_time, download_url ON builds BEGIN
+    DELETE FROM latest_builds WHERE core_type = NEW.core_type AND mc_version = NEW.mc_version;
+    INSERT INTO latest_builds (core_type, mc_version, core_version, download_url, sync_time, mc_version_key)
+    SELECT core_type, mc_version, core_version, download_url, sync_time, mc_version_key FROM builds
+    WHERE core_type = NEW.core_type AND mc_version = NEW.mc_version
+    ORDER BY core_version_key DESC, core_version DESC LIMIT 1;
+END;
+CREATE TRIGGER IF NOT EXISTS latest_delete AFTER DELETE ON builds BEGIN
+    DELETE FROM latest_builds WHERE core_type = OLD.core_type AND mc_version = OLD.mc_version;
+    INSERT INTO latest_builds (core_type, mc_version, core_version, download_url, sync_time, mc_version_key)
+    SELECT core_type, mc_version, core_version, download_url, sync_time, mc_version_key FROM builds
+    WHERE core_type = OLD.core_type AND mc_version = OLD.mc_version
+    ORDER BY core_version_key DESC, core_version DESC LIMIT 1;
+END;
+"""
+REBUILD_LATEST = """
+DELETE FROM latest_builds;
+INSERT INTO latest_builds (core_type, mc_version, core_version, download_url, sync_time, mc_version_key)
+SELECT core_type, mc_version, core_version, download_url, sync_time, mc_version_key FROM (
+    SELECT *, ROW_NUMBER() OVER (
+        PARTITION BY core_type, mc_version ORDER BY core_version_key DESC, core_version DESC
+    ) AS position
+    FROM builds
+)
+WHERE position = 1;
+"""
+CHANGE_COLUMNS = "seq, operation, core_type, mc_version, core_version, download_url, sync_time"
+BUILD_COLUMNS = "sync_time, download_url, core_type, mc_version, core_version"
+# 参数与 BUILD_COLUMNS 一致, 排序键由 natural_sort_key 在写入时计算
+UPSERT_BUILD = f"""
+    INSERT INTO builds ({BUILD_COLUMNS}, mc_version_key, core_version_key)
+    VALUES (?1, ?2, ?3, ?4, ?5, natural_sort_key(?4), natural_sort_key(?5))
+    ON CONFLICT (core_type, mc_version, core_version) DO UPDATE
+    SET sync_time = excluded.sync_time, download_url = excluded.download_url
+    WHERE sync_time IS NOT excluded.sync_time OR download_url IS NOT excluded.download_url
+"""
+
+
+def to_epoch(sync_time: str | int | None) -> int:
+    """ISO 8601 时间 (1970-01-01T00:00:00Z 等) 转为 UTC 时间戳"""
+    if isinstance(sync_time, (int, float)):
+        return int(sync_time)
+    value = str(sync_time or "").strip()
+    if value.endswith("Z"):
+        value = value[:-1]
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return 0
+    if parsed.tzinfo is None:
+        return timegm(parsed.timetuple())
+    return int(parsed.astimezone(timezone.utc).timestamp())
+
+
+def from_epoch(sync_time: int | None) -> str | None:
+    if sync_time is None:
+        return None
+    return strftime("%Y-%m-%dT%H:%M:%SZ", gmtime(sync_time))
+
+
+def build_row(row: tuple) -> dict[str, str]:
+    """(BUILD_COLUMNS) 查询结果转为 API 使用的字典"""
+    return {
+        "sync_time": from_epoch(row[0]),
+        "download_url": row[1],
+        "core_type": row[2],
+        "mc_version": row[3],
+        "core_version": row[4],
+    }
+
+
+def migrate_legacy_tables(connection: sqlite3.Connection) -> int:
+    """将旧版以 MC 版本命名的表合并进 builds 表, 返回迁移的记录数"""
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT IN ('builds', 'build_digests', 'changes', 'journal_state', 'latest_builds') AND name NOT LIKE 'sqlite_%'"
+    )
+    table_list = [row[0] for row in cursor.fetchall()]
+    migrated = 0
+    for table_name in table_list:
+        cursor.execute(f'SELECT {BUILD_COLUMNS} FROM "{table_name}" ORDER BY ROWID')
+        rows = [
+            (to_epoch(sync_time), download_url, core_type, mc_version or table_name, core_version)
+            for sync_time, download_url, core_type, mc_version, core_version in cursor.fetchall()
+            if core_type and core_version
+        ]
+        cursor.executemany(UPSERT_BUILD, rows)
+        migrated += len(rows)
+        cursor.execute(f'DROP TABLE "{table_name}"')
+    return migrated
+
+
+def ensure_schema(connection: sqlite3.Connection) -> None:
+    user_version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if user_version >= SCHEMA_VERSION:
+        return
+    connection.executescript(SCHEMA)
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(builds)")]
+    for column in ("mc_version_key", "core_version_key"):
+        if column not in columns:
+            connection.execute(f"ALTER TABLE builds ADD COLUMN {column} TEXT")
+    connection.executescript(SCHEMA_INDEXES)
+    has_journal = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='changes'"
+    ).fetchone()
+    connection.executescript(CHANGES_SCHEMA)
+    if not has_journal:
+        # 变更日志从现有数据开始, 以便从 seq 0 读取的消费者得到完整数据
+        connection.execute(
+            """
+            INSERT INTO changes (operation, core_type, mc_version, core_version, download_url, sync_time, changed_at)
+            SELECT 'insert', core_type, mc_version, core_version, download_url, sync_time, CAST(strftime('%s', 'now') AS INTEGER)
+            FROM builds ORDER BY id
+            """
+        )
+    migrated = migrate_legacy_tables(connection)
+    connection.execute(
+        """
+        UPDATE builds SET
+            mc_version_key = natural_sort_key(mc_version),
+            core_version_key = natural_sort_key(core_version)
+        WHERE mc_version_key IS NULL OR core_version_key IS NULL OR ?
+        """,
+        (user_version < 7,),
+    )
+    # 排序键在上面补全, 因此最新构建索引最后整体重建
+    connection.executescript(LATEST_SCHEMA)
+    connection.executescript(REBUILD_LATEST)
+    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    connection.commit()
+    if migrated:
+        SyncLogger.info(f"Database | Migrated {migrated} builds to schema v{SCHEMA_VERSION}")
+
+
+def get_setting(key: str, default=None):
+    from . import settings
+
+    # 首次运行时 settings 仍在初始化, cfg 尚不存在
+    return (getattr(settings, "cfg", None) or {}).get(key, default)
+
+
+def use_catalog() -> bool:
+    """开启 cfg["catalog_database"] 后所有核心共用 data/{database_type}/catalog.db"""
+    return bool(get_setting("catalog_database"))
+
+
+PRODUCTION_ROOT = "data/production"
+GENERATIONS_ROOT = f"{PRODUCTION_ROOT}/generations"
+_current_generation: tuple[tuple[int, int], str | None] = ((0, 0), None)
+
+
+def current_generation() -> str | None:
+    """data/production/CURRENT 指向的快照代号, 按文件 inode 与 mtime 缓存"""
+    global _current_generation
+    try:
+        pointer = stat(f"{PRODUCTION_ROOT}/CURRENT")
+    except FileNotFoundError:
+        return None
+    key = (pointer.st_ino, pointer.st_mtime_ns)
+    if _current_generation[0] != key:
+        with open(f"{PRODUCTION_ROOT}/CURRENT", encoding="utf-8") as f:
+            _current_generation = (key, f.read().strip() or None)
+    return _current_generation[1]
+
+
+def core_database_path(database_type: str, core_type: str) -> str:
+    return f"data/{database_type}/{core_type}.db"
+
+
+class ProductionUnavailable(FileNotFoundError):
+    """没有可供读取的 production 数据库"""
+
+
+class MissingDatabase(FileNotFoundError):
+    """当前 production 快照中没有该核心的数据库"""
+
+
+def database_path(database_type: str, core_type: str) -> str:
+    file_name = "catalog.db" if use_catalog() else f"{core_type}.db"
+    if database_type == "production":
+        generation = current_generation()
+        if generation is not None:
+            return f"{GENERATIONS_ROOT}/{generation}/{file_name}"
+        # 尚未发布过快照时, 继续读取手动部署在 data/production 下的数据库
+        if exists(f"{PRODUCTION_ROOT}/{file_name}"):
+            return f"{PRODUCTION_ROOT}/{file_name}"
+        if exists(PRODUCTION_ROOT) and any(
+            name.endswith(".db") for name in listdir(PRODUCTION_ROOT)
+        ):
+            raise MissingDatabase(f"{PRODUCTION_ROOT}/{file_name} does not exist.")
+        raise ProductionUnavailable("No production database is available yet.")
+    return f"data/{database_type}/{file_name}"
+
+
+def database_token(database_type: str, core_type: str) -> tuple:
+    """
+    数据库内容的版本标识, 用于 API 响应缓存的失效
+    production 快照不可变, 路径 (含快照代号) 即可; 其余使用数据库与 WAL 文件的 mtime 与大小
+    """
+    path = database_path(database_type, core_type)
+    if path.startswith(GENERATIONS_ROOT):
+        return (path,)
+    token = [path]
+    for file_path in (path, f"{path}-wal"):
+        try:
+            info = stat(file_path)
+        except FileNotFoundError:
+            token.append(None)
+            continue
+        # 读连接打开时会创建空的 WAL 文件, 与不存在等价
+        token.append((info.st_mtime_ns, info.st_size) if info.st_size else None)
+    return tuple(token)
+
+
+def connect_file(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.create_function(
+        "natural_sort_key", 1, natural_sort_key, deterministic=True
+    )
+    # 仅对新建的数据库生效, 旧数据库在首次清理时通过 VACUUM 转换
+    connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL 模式写入时不阻塞 API 的读取, 设置后持久保存在数据库文件中
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    ensure_schema(connection)
+    return connection
+
+
+def connect_database(database_type: str, core_type: str) -> sqlite3.Connection:
+    return connect_file(database_path(database_type, core_type))
+
+
+class ReadConnections(object):
+    """
+    API 使用的只读连接, 每个线程对每个数据库文件只打开一次
+    预编译语句由连接自身的 statement cache 复用
+    """
+
+    _local = local()
+    _lock = Lock()
+    _opened: list[sqlite3.Connection] = []
+
+    @classmethod
+    def get(cls, path: str) -> sqlite3.Connection:
+        connections = cls._local.__dict__.setdefault("connections", {})
+        connection = connections.get(path)
+        if connection is None:
+            # production 快照发布后不再修改, 以 immutable 打开可跳过所有锁
+            immutable = path.startswith(GENERATIONS_ROOT)
+            if immutable:
+                cls.retire(connections, dirname(path))
+            with cls._lock:
+                if not exists(path) and immutable:
+                    raise MissingDatabase(f"{path} is not part of the current generation.")
+                if not immutable and not cls.is_current(path):
+                    # 确保文件存在且已迁移到当前 schema (并已切换为 WAL)
+                    connect_file(path).close()
+                connection = cls.open(path, immutable)
+                cls._opened.append(connection)
+            connection.execute("PRAGMA mmap_size=268435456")
+            connection.execute("PRAGMA cache_size=-16384")
+            connection.execute("PRAGMA temp_store=MEMORY")
+            connections[path] = connection
+        return connection
+
+    @staticmethod
+    def open(path: str, immutable: bool = False) -> sqlite3.Connection:
+        return sqlite3.connect(
+            f"file:{path}?mode=ro" + ("&immutable=1" if immutable else ""),
+            uri=True,
+            cached_statements=256,
+            check_same_thread=False,
+        )
+
+    @classmethod
+    def is_current(cls, path: str) -> bool:
+        """
+        以只读方式检查 schema 版本
+        可写连接关闭时会执行 checkpoint 并删除 WAL, 改变文件的 mtime (即响应缓存的标识)
+        """
+        if not exists(path):
+            return False
+        with closing(cls.open(path)) as connection:
+            return connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION
+
+    @classmethod
+    def retire(cls, connections: dict, generation: str) -> None:
+        """关闭当前线程中指向旧快照的连接"""
+        for path in [
+            path
+            for path in connections
+            if path.startswith(GENERATIONS_ROOT) and dirname(path) != generation
+        ]:
+            connection = connections.pop(path)
+            with cls._lock:
+                cls._opened.remove(connection)
+            connection.close()
+
+    @classmethod
+    def close(cls) -> None:
+        """关闭所有线程打开的连接, 仅在不再有查询时调用"""
+        with cls._lock:
+            for connection in cls._opened:
+                connection.close()
+            cls._opened.clear()
+        cls._local = local()
+
+
+@Singleton
+class QueryExecutor(object):
+    """
+    API 的数据库查询在独立的线程池中执行, 不阻塞事件循环
+    记录每次查询 (含排队) 的耗时用于统计延迟分位数
+    """
+
+    def __init__(self) -> None:
+        self.max_workers = int(get_setting("database_workers", 4))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="database"
+        )
+        self.latencies: deque[float] = deque(maxlen=4096)
+        self.queries: int = 0
+
+    async def run(self, func, *args):
+        start = perf_counter()
+        try:
+            return await get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.latencies.append(perf_counter() - start)
+            self.queries += 1
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        samples = sorted(self.latencies)
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "queries": self.queries,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        ReadConnections.close()
+        stats = self.stats()
+        SyncLogger.info(
+            f"Database | Queries: {stats['queries']}, p50: {stats['p50_ms']}ms, p99: {stats['p99_ms']}ms"
+        )
+
+
+def read_connection(database_type: str, core_type: str) -> sqlite3.Connection:
+    return ReadConnections.get(database_path(database_type, core_type))
+
+
 def init_database() -> None:
+    if use_catalog():
+        with connect_file("data/runtime/catalog.db"):
+            pass
+        return
     for core_type in available_downloads:
-        with sqlite3.connect(f"data/runtime/{core_type}.db"):
+        with connect_database("runtime", core_type):
             pass
 
 
+def migrate_database(database_type: str = "runtime") -> None:
+    for core_type in available_downloads:
+        path = core_database_path(database_type, core_type)
+        if not exists(path):
+            continue
+        with connect_file(path) as core:
+            if use_catalog():
+                copy_into_catalog(database_type, core)
+    SyncLogger.success(f"Database | {database_type} schema is at v{SCHEMA_VERSION}.")
+    if database_type == "production" and current_generation() is None:
+        seed_generation()
+
+
+def seed_generation() -> str | None:
+    """以手动部署在 data/production 下的数据库作为第一个 production 快照"""
+    file_names = (
+        ["catalog.db"]
+        if use_catalog()
+        else [f"{core_type}.db" for core_type in available_downloads]
+    )
+    if not any(exists(f"{PRODUCTION_ROOT}/{file_name}") for file_name in file_names):
+        return None
+    return promote_database(PRODUCTION_ROOT)
+
+
+def copy_into_catalog(database_type: str, core: sqlite3.Connection) -> None:
+    rows = core.execute(f"SELECT {BUILD_COLUMNS} FROM builds ORDER BY id").fetchall()
+    with connect_file(f"data/{database_type}/catalog.db") as catalog:
+        catalog.executemany(UPSERT_BUILD, rows)
+        catalog.commit()
+
+
+def list_generations() -> list[str]:
+    if not exists(GENERATIONS_ROOT):
+        return []
+    return sorted(name for name in listdir(GENERATIONS_ROOT) if not name.endswith(".tmp"))
+
+
+def switch_generation(generation: str) -> None:
+    with open(f"{PRODUCTION_ROOT}/CURRENT.tmp", "w", encoding="utf-8") as f:
+        f.write(generation)
+    replace(f"{PRODUCTION_ROOT}/CURRENT.tmp", f"{PRODUCTION_ROOT}/CURRENT")
+
+
+def promote_database(source_root: str = "data/runtime") -> str:
+    """用 backup API 将 source_root 下的数据库快照为新的 production 代, 并原子地切换 CURRENT"""
+    generation = strftime("%Y%m%dT%H%M%SZ", gmtime())
+    while exists(f"{GENERATIONS_ROOT}/{generation}"):
+        generation += "+"
+    building = f"{GENERATIONS_ROOT}/{generation}.tmp"
+    makedirs(building, exist_ok=True)
+    file_names = (
+        ["catalog.db"]
+        if use_catalog()
+        else [f"{core_type}.db" for core_type in available_downloads]
+    )
+    count = 0
+    for file_name in file_names:
+        if not exists(f"{source_root}/{file_name}"):
+            continue
+        with closing(connect_file(f"{source_root}/{file_name}")) as source, closing(
+            sqlite3.connect(f"{building}/{file_name}")
+        ) as snapshot:
+            source.backup(snapshot)
+            # immutable 读取时不会处理 WAL 文件
+            snapshot.execute("PRAGMA journal_mode=DELETE")
+        count += 1
+    replace(building, f"{GENERATIONS_ROOT}/{generation}")
+    switch_generation(generation)
+    prune_generations()
+    SyncLogger.success(f"Database | Promoted generation {generation} ({count} databases).")
+    return generation
+
+
+def rollback_database() -> str | None:
+    generations = list_generations()
+    current = current_generation()
+    if current not in generations or generations.index(current) == 0:
+        SyncLogger.error("Database | No earlier production generation to roll back to.")
+        return None
+    previous = generations[generations.index(current) - 1]
+    switch_generation(previous)
+    SyncLogger.success(f"Database | Rolled back production from {current} to {previous}.")
+    return previous
+
+
+def prune_generations() -> None:
+    keep = max(int(get_setting("production_generations", 3)), 1)
+    current = current_generation()
+    for generation in list_generations()[:-keep]:
+        if generation != current:
+            rmtree(f"{GENERATIONS_ROOT}/{generation}", ignore_errors=True)
+
+
 async def get_mc_versions(database_type: str, core_type: str) -> list[str]:
-    with sqlite3.connect(f"data/{database_type}/{core_type}.db") as core:
-        cursor = core.cursor()
-        cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
-        )
-        version_list = [row[0] for row in cursor.fetchall()]
-        try:
-            version_list = sort_versions_descending(version_list)
-        except Exception:
-            # 如果版本排序失败，使用字符串降序排序作为备选
-            version_list = sorted(version_list, reverse=True)
-        return version_list
+    return await QueryExecutor().run(select_mc_versions, database_type, core_type)
+
+
+def select_mc_versions(database_type: str, core_type: str) -> list[str]:
+    cursor = read_connection(database_type, core_type).cursor()
+    cursor.execute(
+        """
+        SELECT DISTINCT mc_version, mc_version_key FROM builds
+        WHERE core_type = ? ORDER BY mc_version_key DESC
+        """,
+        (core_type,),
+    )
+    return [row[0] for row in cursor.fetchall()]
 
 
 async def get_core_versions(
     database_type: str, core_type: str, mc_version: str
 ) -> list[str]:
-    with sqlite3.connect(f"data/{database_type}/{core_type}.db") as core:
-        cursor = core.cursor()
-        cursor.execute(f"SELECT core_version FROM '{mc_version}' ORDER BY core_version")
-        version_list = [row[0] for row in cursor.fetchall()]
-        try:
-            version_list = sort_versions_descending(version_list)
-        except Exception:
-            # 如果版本排序失败，使用字符串降序排序作为备选
-            version_list = sorted(version_list, reverse=True)
-        return version_list
+    """mc_version 不存在时返回空列表"""
+    return await QueryExecutor().run(
+        select_core_versions, database_type, core_type, mc_version
+    )
+
+
+def select_core_versions(
+    database_type: str, core_type: str, mc_version: str
+) -> list[str]:
+    cursor = read_connection(database_type, core_type).cursor()
+    cursor.execute(
+        """
+        SELECT core_version FROM builds
+        WHERE core_type = ? AND mc_version = ? ORDER BY core_version_key DESC
+        """,
+        (core_type, mc_version),
+    )
+    return [row[0] for row in cursor.fetchall()]
 
 
 async def get_specified_core_data(
     database_type: str, core_type: str, mc_version: str, core_version: str
 ) -> dict[str, str]:
-    with sqlite3.connect(f"data/{database_type}/{core_type}.db") as core:
+    """构建不存在时返回空字典"""
+    return await QueryExecutor().run(
+        select_core_data, database_type, core_type, mc_version, core_version
+    )
+
+
+def select_core_data(
+    database_type: str, core_type: str, mc_version: str, core_version: str
+) -> dict[str, str]:
+    # UNIQUE (core_type, mc_version, core_version) 索引上的单次查找, 与版本及构建数量无关
+    cursor = read_connection(database_type, core_type).cursor()
+    cursor.execute(
+        f"""
+        SELECT {BUILD_COLUMNS} FROM builds
+        WHERE core_type = ? AND mc_version = ? AND core_version = ?
+        """,
+        (core_type, mc_version, core_version),
+    )
+    row = cursor.fetchone()
+    return build_row(row) if row else {}
+
+
+async def get_latest_sync_time(database_type: str, core_type: str) -> str | None:
+    with connect_database(database_type, core_type) as core:
+        cursor = core.cursor()
+        cursor.execute(
+            "SELECT MAX(sync_time) FROM builds WHERE core_type = ?", (core_type,)
+        )
+        return from_epoch(cursor.fetchone()[0])
+
+
+async def get_synced_mc_versions(database_type: str, core_type: str) -> set[str]:
+    """同步端使用, 直接读取数据库而不经过 API 的 QueryExecutor"""
+    with connect_database(database_type, core_type) as core:
+        cursor = core.cursor()
+        cursor.execute(
+            "SELECT DISTINCT mc_version FROM builds WHERE core_type = ?", (core_type,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+async def get_latest_build_number(
+    database_type: str, core_type: str, url_prefix: str, mc_version: str | None = None
+) -> int | None:
+    """core_version 为 buildN (或 buildN-xxx) 且下载地址以 url_prefix 开头的最大构建号"""
+    with connect_database(database_type, core_type) as core:
         cursor = core.cursor()
         cursor.execute(
-            f"SELECT * FROM '{mc_version}' WHERE core_version='{core_version}'"
+            """
+            SELECT MAX(CAST(SUBSTR(core_version, 6) AS INTEGER)) FROM builds
+            WHERE core_type = ? AND (? IS NULL OR mc_version = ?)
+                AND core_version LIKE 'build%' AND SUBSTR(download_url, 1, ?) = ?
+            """,
+            (core_type, mc_version, mc_version, len(url_prefix), url_prefix),
+        )
+        return cursor.fetchone()[0]
+
+
+def change_row(row: tuple) -> dict:
+    """(CHANGE_COLUMNS) 查询结果转为变更流中的一条记录"""
+    return {
+        "seq": row[0],
+        "operation": row[1],
+        "core_type": row[2],
+        "mc_version": row[3],
+        "core_version": row[4],
+        "download_url": row[5],
+        "sync_time": from_epoch(row[6]),
+    }
+
+
+async def get_changes(
+    database_type: str, core_type: str | None, since: int, limit: int = 1000
+) -> tuple[list[dict], int]:
+    """
+    seq 大于 since 的至多 limit 条变更, 以及已被清理的最大 seq (since 小于它时需要全量同步)
+    core_type 为 None 时返回 catalog 中所有核心的变更
+    """
+    return await QueryExecutor().run(
+        select_changes, database_type, core_type, since, limit
+    )
+
+
+def select_changes(
+    database_type: str, core_type: str | None, since: int, limit: int
+) -> tuple[list[dict], int]:
+    cursor = read_connection(database_type, core_type or "").cursor()
+    if core_type is None:
+        cursor.execute(
+            f"SELECT {CHANGE_COLUMNS} FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+            (since, limit),
+        )
+    else:
+        cursor.execute(
+            f"""
+            SELECT {CHANGE_COLUMNS} FROM changes
+            WHERE core_type = ? AND seq > ? ORDER BY seq LIMIT ?
+            """,
+            (core_type, since, limit),
+        )
+    rows = [change_row(row) for row in cursor.fetchall()]
+    cursor.execute("SELECT value FROM journal_state WHERE name = 'trimmed_seq'")
+    trimmed = cursor.fetchone()
+    return rows, trimmed[0] if trimmed else 0
+
+
+async def get_latest_builds(database_type: str, mc_version: str) -> list[dict[str, str]]:
+    """
+    每个核心在 mc_version 下最新的构建, 与 get_latest_matrix 同样读取 latest_builds 表
+    启用 catalog 时为单条查询
+    """
+    return await QueryExecutor().run(select_latest_builds, database_type, mc_version)
+
+
+def select_latest_builds(database_type: str, mc_version: str) -> list[dict[str, str]]:
+    query = f"""
+        SELECT {BUILD_COLUMNS} FROM latest_builds
+        WHERE mc_version = ? ORDER BY core_type
+    """
+    if use_catalog():
+        catalog = read_connection(database_type, "")
+        return [build_row(row) for row in catalog.execute(query, (mc_version,))]
+    result = []
+    for core_type in available_downloads:
+        try:
+            core = read_connection(database_type, core_type)
+        except MissingDatabase:
+            continue
+        result.extend(build_row(row) for row in core.execute(query, (mc_version,)))
+    return result
+
+
+async def get_latest_matrix(
+    database_type: str, core_type: str | None = None
+) -> dict[str, dict[str, dict]]:
+    """
+    每个核心每个 MC 版本最新的构建, 读取触发器维护的 latest_builds 表
+    返回 {core_type: {mc_version: {core_version, download_url, sync_time}}}, MC 版本从新到旧
+    """
+    return await QueryExecutor().run(select_latest_matrix, database_type, core_type)
+
+
+def select_latest_matrix(
+    database_type: str, core_type: str | None = None
+) -> dict[str, dict[str, dict]]:
+    core_types = [core_type] if core_type else list(available_downloads)
+    query = """
+        SELECT mc_version, core_version, download_url, sync_time FROM latest_builds
+        WHERE core_type = ? ORDER BY mc_version_key DESC
+    """
+    matrix = {}
+    for core in core_types:
+        try:
+            connection = read_connection(database_type, core)
+        except MissingDatabase:
+            if core_type:
+                raise
+            # 快照中没有该核心的数据库, 矩阵中省略
+            continue
+        versions = {
+            mc_version: {
+                "core_version": core_version,
+                "download_url": download_url,
+                "sync_time": from_epoch(sync_time),
+            }
+            for mc_version, core_version, download_url, sync_time in connection.execute(
+                query, (core,)
+            )
+        }
+        if versions:
+            matrix[core] = versions
+    return matrix
+
+
+def build_digest(rows: list[tuple]) -> str:
+    """构建集合的摘要, 与顺序无关"""
+    digest = sha256()
+    for row in sorted(rows):
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@Singleton
+class BuildDigests(object):
+    """
+    每个 (core_type, mc_version) 上次写入的构建集合摘要, 保存在数据库的 build_digests 表中
+    每个数据库文件在一次运行中只读取一次, 摘要未变化的集合不再打开写事务
+    """
+
+    def __init__(self) -> None:
+        self.digests: dict[str, dict[tuple[str, str], str]] = {}
+        self.skipped: int = 0
+        self.written: int = 0
+
+    def load(self, path: str) -> dict[tuple[str, str], str]:
+        digests = self.digests.get(path)
+        if digests is None:
+            with closing(connect_file(path)) as connection:
+                digests = {
+                    (core_type, mc_version): digest
+                    for core_type, mc_version, digest in connection.execute(
+                        "SELECT core_type, mc_version, digest FROM build_digests"
+                    )
+                }
+            self.digests[path] = digests
+        return digests
+
+    def is_unchanged(self, path: str, core_type: str, mc_version: str, digest: str) -> bool:
+        if self.load(path).get((core_type, mc_version)) == digest:
+            self.skipped += 1
+            return True
+        return False
+
+    def store(
+        self,
+        connection: sqlite3.Connection,
+        path: str,
+        core_type: str,
+        mc_version: str,
+        digest: str,
+    ) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO build_digests (core_type, mc_version, digest) VALUES (?, ?, ?)",
+            (core_type, mc_version, digest),
         )
-        columns = [column[0] for column in cursor.description]
-        core_data = [dict(zip(columns, row)) for row in cursor.fetchall()][0]
-        return core_data
+        self.load(path)[(core_type, mc_version)] = digest
+        self.written += 1
+
+    def report(self) -> None:
+        if self.skipped or self.written:
+            SyncLogger.info(
+                f"Database | Build sets written: {self.written}, Skipped (unchanged): {self.skipped}"
+            )
 
 
 @SyncLogger.catch
 def update_database(
     database_type: str, core_type: str, mc_version: str, builds: list
 ) -> None:
-    with sqlite3.connect(f"data/{database_type}/{core_type}.db") as database:
+    # 同一构建出现多次 (多个产物) 时保留第一条, 与旧版 API 返回首个产物的行为一致
+    unique_builds = {}
+    for build in builds:
+        unique_builds.setdefault(
+            (build["core_type"], build["mc_version"], build["core_version"]), build
+        )
+    rows = [
+        (
+            to_epoch(build["sync_time"]),
+            build["download_url"],
+            build["core_type"],
+            build["mc_version"],
+            build["core_version"],
+        )
+        for build in unique_builds.values()
+    ]
+    path = database_path(database_type, core_type)
+    digest = build_digest(rows)
+    if BuildDigests().is_unchanged(path, core_type, mc_version, digest):
+        return
+    with closing(connect_file(path)) as database:
         cursor = database.cursor()
-        try:
-            cursor.execute(
-                f"""
-                    CREATE TABLE "{mc_version}" (
-                        sync_time TEXT,
-                        download_url TEXT,
-                        core_type TEXT,
-                        mc_version TEXT,
-                        core_version TEXT
-                    )
-                    """
-            )
-        except sqlite3.OperationalError:
-            pass
-        
-        # 统计更新和插入的数量
-        updated_count = 0
-        inserted_count = 0
-        
-        # 增量更新逻辑：检查每个构建是否已存在
-        for build in builds:
-            # 检查是否已存在相同的记录（基于 download_url 和 core_version）
-            cursor.execute(
-                f"""
-                SELECT COUNT(*) FROM "{mc_version}" 
-                WHERE download_url = ? AND core_version = ?
-                """,
-                (build['download_url'], build['core_version'])
-            )
-            exists = cursor.fetchone()[0] > 0
-            
-            if exists:
-                # 更新现有记录的 sync_time
-                cursor.execute(
-                    f"""
-                    UPDATE "{mc_version}" 
-                    SET sync_time = ?
-                    WHERE download_url = ? AND core_version = ?
-                    """,
-                    (build['sync_time'], build['download_url'], build['core_version'])
-                )
-                updated_count += 1
-            else:
-                # 插入新记录
-                cursor.execute(
-                    f"""
-                    INSERT INTO "{mc_version}" (sync_time, download_url, core_type, mc_version, core_version)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (build['sync_time'], build['download_url'], build['core_type'], 
-                     build['mc_version'], build['core_version'])
-                )
-                inserted_count += 1
-        
-        # 去重逻辑（保留现有逻辑）
+        cursor.execute("SELECT IFNULL(MAX(id), 0) FROM builds")
+        max_id = cursor.fetchone()[0]
+
+        # 已存在的 (core_type, mc_version, core_version) 仅在内容变化时更新
+        cursor.executemany(UPSERT_BUILD, rows)
+        changed_count = max(cursor.rowcount, 0)
+        cursor.execute("SELECT COUNT(*) FROM builds WHERE id > ?", (max_id,))
+        inserted_count = cursor.fetchone()[0]
+        updated_count = changed_count - inserted_count
         cursor.execute(
-            f"""
-            DELETE FROM "{mc_version}"
-            WHERE ROWID NOT IN (
-                SELECT MIN(ROWID)
-                FROM "{mc_version}"
-                GROUP BY sync_time, download_url, core_type, mc_version, core_version
-            )
-            """
+            "SELECT COUNT(*) FROM builds WHERE core_type = ? AND mc_version = ?",
+            (core_type, mc_version),
         )
-        
-        # 检查表是否为空，如果为空则删除表
-        cursor.execute(f"SELECT COUNT(*) FROM '{mc_version}'")
         count = cursor.fetchone()[0]
-        if count == 0:
-            cursor.execute(f"DROP TABLE '{mc_version}'")
-            SyncLogger.info(f"{core_type} | {mc_version} | Table dropped (empty)")
-        else:
-            SyncLogger.info(f"{core_type} | {mc_version} | Updated: {updated_count}, Inserted: {inserted_count}, Total: {count}")
-        
+        SyncLogger.info(f"{core_type} | {mc_version} | Updated: {updated_count}, Inserted: {inserted_count}, Total: {count}")
+        BuildDigests().store(database, path, core_type, mc_version, digest)
         database.commit()
 
 
+DEFAULT_RETENTION = {"keep_builds": 35, "keep_days": 0}
+
+
+def retention_policy(core_type: str) -> dict[str, int]:
+    """
+    cfg["retention"] 中 core_type 的策略, 未配置时使用 "default"
+    满足任一条件的构建会被保留: 每个 MC 版本最新的 keep_builds 个, 或 keep_days 天内同步的
+    每个 MC 版本最新的构建始终保留
+    """
+    policies = get_setting("retention") or {}
+    policy = dict(DEFAULT_RETENTION)
+    policy.update(policies.get("default", {}))
+    policy.update(policies.get(core_type, {}))
+    return policy
+
+
+def apply_retention(connection: sqlite3.Connection, core_type: str) -> int:
+    policy = retention_policy(core_type)
+    keep_days = int(policy.get("keep_days") or 0)
+    # keep_days 为 0 时不按时间保留
+    cutoff = int(time()) - keep_days * 86400 if keep_days > 0 else 2**62
+    cursor = connection.execute(
+        """
+        DELETE FROM builds WHERE id IN (
+            SELECT id FROM (
+                SELECT id, sync_time, ROW_NUMBER() OVER (
+                    PARTITION BY mc_version ORDER BY sync_time DESC, core_version_key DESC
+                ) AS position
+                FROM builds WHERE core_type = ?
+            )
+            WHERE position > MAX(?, 1) AND sync_time < ?
+        )
+        """,
+        (core_type, int(policy.get("keep_builds") or 0), cutoff),
+    )
+    return cursor.rowcount
+
+
+def trim_journal(connection: sqlite3.Connection) -> None:
+    """删除 change_journal_days 天前的变更, 并记录被删除的最大 seq"""
+    cutoff = int(time()) - int(get_setting("change_journal_days", 30)) * 86400
+    trimmed = connection.execute(
+        "SELECT MAX(seq) FROM changes WHERE changed_at < ?", (cutoff,)
+    ).fetchone()[0]
+    if trimmed is None:
+        return
+    connection.execute("DELETE FROM changes WHERE seq <= ?", (trimmed,))
+    connection.execute(
+        """
+        INSERT INTO journal_state (name, value) VALUES ('trimmed_seq', ?)
+        ON CONFLICT (name) DO UPDATE SET value = excluded.value
+        """,
+        (trimmed,),
+    )
+
+
+def database_bytes(connection: sqlite3.Connection) -> int:
+    """数据库占用的页面大小, 与 WAL 中尚未合并的内容无关"""
+    page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+    page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
 async def optimize_core_data(database_type: str = "runtime") -> None:
+    # 启用 catalog 时所有核心共用一个文件
+    paths: dict[str, list[str]] = {}
     for core_type in available_downloads:
-        with sqlite3.connect(f"data/{database_type}/{core_type}.db") as core:
-            cursor = core.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            table_list = [row[0] for row in cursor.fetchall()]
-            for table_name in table_list:
-                cursor.execute(
-                    f"SELECT * FROM '{table_name}' ORDER BY ROWID DESC LIMIT 35"
-                )
-                rows = cursor.fetchall()
-                cursor.execute(f"DELETE FROM '{table_name}'")
-                cursor.executemany(
-                    f"INSERT INTO '{table_name}' VALUES (?, ?, ?, ?, ?)", rows
-                )
-                cursor.execute(f"SELECT COUNT(*) FROM '{table_name}'")
-                count = cursor.fetchone()[0]
-                if count == 0:
-                    cursor.execute(f"DROP TABLE '{table_name}'")
+        paths.setdefault(database_path(database_type, core_type), []).append(core_type)
+    total_deleted = 0
+    total_reclaimed = 0
+    for path, core_types in paths.items():
+        with closing(connect_file(path)) as core:
+            deleted = 0
+            for core_type in core_types:
+                deleted += apply_retention(core, core_type)
+            trim_journal(core)
             core.commit()
+            size = database_bytes(core)
+            if core.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # 旧数据库需要一次完整 VACUUM 才能启用增量回收
+                core.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                core.execute("VACUUM")
+            else:
+                # sqlite3 的 execute 只执行一步, 每步仅释放一页; executescript 会执行到底
+                core.executescript("PRAGMA incremental_vacuum;")
+            # 首次 VACUUM 可能让文件变大, 不计为负数
+            reclaimed = max(size - database_bytes(core), 0)
+            core.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if not deleted:
+            continue
+        total_deleted += deleted
+        total_reclaimed += reclaimed
+        SyncLogger.info(
+            f"Retention | {', '.join(core_types) if len(core_types) == 1 else path} | Deleted: {deleted}, Reclaimed: {reclaimed / 1024:.1f} KiB"
+        )
+    SyncLogger.success(
+        f"Retention | Deleted {total_deleted} builds, reclaimed {total_reclaimed / 1024:.1f} KiB."
+    )
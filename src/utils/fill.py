@@ -0,0 +1,150 @@
+from .network import get_json
+from .logger import SyncLogger
+from .database import get_latest_build_number, update_database
+from traceback import format_exception
+from asyncio import create_task
+
+
+class FillProjectList(object):
+    """
+    PaperMC / GeyserMC 同一套 v2 项目 API (project -> version -> builds) 的通用同步流程
+    子类只需给出 API 根地址与下载文件的取法
+    """
+
+    name: str = ""
+    api_root: str = ""
+    excluded_projects: tuple[str, ...] = ()
+    # 为 True 时每个构建的所有下载项都写入数据库 (core_version 为 buildN-类型)
+    multi_download: bool = False
+    # 为 True 时忽略数据库中的最新构建号, 重新写入所有版本 (--full-reconcile)
+    full_reconcile: bool = False
+
+    def __init__(self) -> None:
+        self.project_id_list: list = []
+        self.project_list: list[FillProject] = []
+
+    async def load_self(self) -> None:
+        tmp_data = await get_json(f"{self.api_root}/projects")
+        self.project_id_list = (
+            tmp_data.get("projects", None) if isinstance(tmp_data, dict) else None
+        )
+        if self.project_id_list is None:
+            SyncLogger.error(f"{self.name} | Project list load failed!")
+            self.project_id_list = []
+        self.project_id_list = [
+            project_id
+            for project_id in self.project_id_list
+            if project_id not in self.excluded_projects
+        ]
+
+    async def load_all_projects(self) -> None:
+        tasks = [
+            create_task(self.load_single_project(project_id=project_id))
+            for project_id in self.project_id_list
+        ]
+        for task in tasks:
+            await task
+        del tasks
+
+    async def load_single_project(self, project_id: str) -> None:
+        try:
+            p = FillProject(loader=self, project_id=project_id)
+            await p.load_self()
+            self.project_list.append(p)
+        except Exception as e:
+            SyncLogger.warning(
+                f"{project_id.capitalize()} | Failed to load project!"
+            )
+            SyncLogger.error("".join(format_exception(e)))
+        SyncLogger.success(f"{project_id.capitalize()} | All versions were loaded.")
+
+
+class FillProject(object):
+    def __init__(self, loader: FillProjectList, project_id: str) -> None:
+        self.loader = loader
+        self.project_id: str = project_id
+        self.project_name: str = project_id.capitalize()
+        self.version_label_list: list = []
+        self.skipped: int = 0
+
+    @property
+    def project_link(self) -> str:
+        return f"{self.loader.api_root}/projects/{self.project_id}"
+
+    async def load_self(self) -> None:
+        tmp_data = await get_json(self.project_link)  # type: dict
+        if not isinstance(tmp_data, dict):
+            tmp_data = {}
+
+        self.project_name = tmp_data.get("project_name", None) or self.project_name
+        self.version_label_list = tmp_data.get("versions", None)
+
+        if self.version_label_list is None:
+            SyncLogger.error(f"{self.project_id.capitalize()} | Project info load failed!")
+            return
+        tasks = [
+            create_task(self.load_single_version(version=version))
+            for version in self.version_label_list
+        ]
+        for task in tasks:
+            await task
+        del tasks
+        SyncLogger.info(
+            f"{self.project_name} | {self.skipped}/{len(self.version_label_list)} versions unchanged, skipped."
+        )
+
+    async def load_single_version(self, version: str) -> None:
+        # /versions/{version}/builds 已包含所需的全部信息, 无需再请求 /versions/{version}
+        link = f"{self.project_link}/versions/{version}/builds"
+        try:
+            tmp_data = await get_json(link)
+            builds = tmp_data.get("builds", None) if isinstance(tmp_data, dict) else None
+            if builds is None:
+                SyncLogger.error(
+                    f"{self.project_name} | {version} | Failed to load builds!"
+                )
+                return
+            builds = sorted(builds, key=lambda build: build["build"], reverse=True)
+            if builds and not self.loader.full_reconcile:
+                latest = await get_latest_build_number(
+                    "runtime", self.project_name, f"{link}/", mc_version=version
+                )
+                if latest is not None and latest >= builds[0]["build"]:
+                    self.skipped += 1
+                    return
+            update_database(
+                "runtime",
+                self.project_name,
+                version,
+                builds=[
+                    data
+                    for build in builds
+                    for data in self.gather_single_build(link, version, build)
+                ],
+            )
+        except Exception as e:
+            SyncLogger.warning(
+                f"{self.project_name} | {version} | Failed to load builds!"
+            )
+            SyncLogger.error("".join(format_exception(e)))
+
+    def gather_single_build(
+        self, link: str, version: str, build_info: dict
+    ) -> list[dict[str, str]]:
+        build = build_info["build"]
+        downloads = build_info.get("downloads") or {}
+        if not self.loader.multi_download:
+            application = downloads.get("application") or {}
+            downloads = {application.get("name"): application}
+        return [
+            {
+                "sync_time": str(build_info["time"]).split(".")[0] + "Z",
+                "download_url": f"{link}/{build}/downloads/{download_name}",
+                "core_type": self.project_name,
+                "mc_version": str(version),
+                "core_version": f"build{build}-{download_name}"
+                if self.loader.multi_download
+                else f"build{build}",
+            }
+            for download_name in downloads
+        ]
@@ -1,19 +1,260 @@
-from .network import get_json
+from .network import get_json, get_json_response, post_json
 from .logger import SyncLogger
 from .minecraft import sort_versions_descending
+from .settings import cfg
+from .database import get_latest_sync_time
+from .decorators import Singleton
+from asyncio import Future, Task, create_task, gather, get_running_loop, sleep
+from os import getenv
+from re import search
+from urllib.parse import parse_qs, urlsplit
 from pandas import DataFrame
 
 
+def get_github_token() -> str:
+    return cfg.get("github_token") or getenv("GITHUB_TOKEN", "")
+
+
+def github_headers() -> dict[str, str]:
+    headers = {
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    token = get_github_token()
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def parse_last_page(link_header: str | None) -> int | None:
+    """从 Link 响应头中解析 rel="last" 的页码"""
+    if not link_header:
+        return None
+    match = search(r'<([^>]+)>;\s*rel="last"', link_header)
+    if match is None:
+        return None
+    try:
+        return int(parse_qs(urlsplit(match.group(1)).query)["page"][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+GITHUB_GRAPHQL_ENDPOINT = "https://api.github.com/graphql"
+RELEASES_FRAGMENT = """
+    releases(first: 100, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage }
+      nodes {
+        name
+        tagName
+        publishedAt
+        isDraft
+        releaseAssets(first: 50) { nodes { name downloadUrl } }
+      }
+    }
+"""
+
+
+@Singleton
+class GitHubGraphQLLoader(object):
+    """
+    把同一时间段内各个 Serializer 的请求合并成一次 GraphQL 别名查询
+    返回与 REST /releases 结构一致的数据, 以复用各子类的 get_assets
+    """
+
+    def __init__(self, batch_window: float = 0.05, max_batch: int = 20) -> None:
+        self.endpoint: str = cfg.get("github_graphql_endpoint") or GITHUB_GRAPHQL_ENDPOINT
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.pending: list[tuple[str, str, Future]] = []
+        self.queries: int = 0
+        self.repos: int = 0
+        self._flush_task: Task | None = None
+
+    def available(self) -> bool:
+        # GitHub 的 GraphQL 接口必须鉴权, 自定义 (本地) 端点除外
+        return bool(get_github_token()) or self.endpoint != GITHUB_GRAPHQL_ENDPOINT
+
+    async def load(self, owner: str, repo: str) -> tuple[list[dict], bool] | None:
+        future = get_running_loop().create_future()
+        self.pending.append((owner, repo, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        await sleep(self.batch_window)
+        pending, self.pending = self.pending, []
+        try:
+            await gather(
+                *[
+                    self._load_batch(pending[i : i + self.max_batch])
+                    for i in range(0, len(pending), self.max_batch)
+                ]
+            )
+            SyncLogger.info(
+                f"GitHub GraphQL | {self.repos} repositories loaded in {self.queries} queries"
+            )
+        finally:
+            # 本轮查询期间加入的请求看到 _flush_task 未完成, 不会自行调度, 由这里接着处理
+            if self.pending:
+                self._flush_task = create_task(self._flush())
+
+    async def _load_batch(self, batch: list[tuple[str, str, Future]]) -> None:
+        variables = {}
+        definitions = []
+        fields = []
+        for idx, (owner, repo, _) in enumerate(batch):
+            variables[f"owner{idx}"] = owner
+            variables[f"name{idx}"] = repo
+            definitions.append(f"$owner{idx}: String!, $name{idx}: String!")
+            fields.append(
+                f"r{idx}: repository(owner: $owner{idx}, name: $name{idx}) {{{RELEASES_FRAGMENT}}}"
+            )
+        query = "query({definitions}) {{\n{fields}\n}}".format(
+            definitions=", ".join(definitions), fields="\n".join(fields)
+        )
+        self.queries += 1
+        self.repos += len(batch)
+        try:
+            data = await post_json(
+                self.endpoint,
+                {"query": query, "variables": variables},
+                headers=github_headers(),
+            )
+            repositories = data.get("data") if isinstance(data, dict) else None
+            if isinstance(data, dict) and data.get("errors"):
+                SyncLogger.warning(f"GitHub GraphQL | {data['errors']}")
+            for idx, (owner, repo, future) in enumerate(batch):
+                repository = (repositories or {}).get(f"r{idx}")
+                if future.done():
+                    continue
+                future.set_result(
+                    self.serialize_repository(owner, repo, repository) if repository else None
+                )
+        except Exception as e:
+            SyncLogger.warning(f"GitHub GraphQL | Batch of {len(batch)} repositories failed: {e!r}")
+        finally:
+            # 未完成的请求回退到 REST, 避免调用方永远等待
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    @staticmethod
+    def serialize_repository(
+        owner: str, repo: str, repository: dict
+    ) -> tuple[list[dict], bool] | None:
+        """结构不符合预期时返回 None, 由该仓库回退到 REST"""
+        try:
+            releases = repository["releases"]
+            return (
+                [
+                    {
+                        # GraphQL 不提供 target_commitish
+                        "target_commitish": None,
+                        "name": node["name"],
+                        "tag_name": node["tagName"],
+                        "published_at": node["publishedAt"],
+                        "assets": [
+                            {"name": asset["name"], "browser_download_url": asset["downloadUrl"]}
+                            for asset in node["releaseAssets"]["nodes"]
+                        ],
+                    }
+                    for node in releases["nodes"]
+                    if not node.get("isDraft")
+                ],
+                releases["pageInfo"]["hasNextPage"],
+            )
+        except (KeyError, TypeError, AttributeError) as e:
+            SyncLogger.warning(f"GitHub GraphQL | {owner}/{repo} | Unexpected response: {e!r}")
+            return None
+
+
 class GitHubReleaseSerializer(object):
-    def __init__(self, owner: str, repo: str) -> None:
+    per_page: int = 100
+    # 需要完整发布历史的子类 (例如按发布顺序编号) 应关闭增量获取
+    incremental: bool = True
+    # 依赖 GraphQL 不提供的字段 (target_commitish) 的子类应关闭
+    graphql: bool = True
+    # --full-reconcile: 忽略数据库中最新的发布时间, 重新获取完整的发布历史
+    full_reconcile: bool = False
+
+    def __init__(self, owner: str, repo: str, core_type: str | None = None) -> None:
         self.api_link = "https://api.github.com/repos/{user}/{repo}/releases".format(
             user=owner, repo=repo
         )
+        self.owner = owner
+        self.repo = repo
+        self.core_type = core_type
         self.release_list: list[dict] = []
 
+    def page_link(self, page: int) -> str:
+        return f"{self.api_link}?per_page={self.per_page}&page={page}"
+
+    async def fetch_releases(self) -> list[dict] | None:
+        response = await get_json_response(self.page_link(1), headers=github_headers())
+        if response is None or not isinstance(response[0], list):
+            return None
+        releases, headers = response
+        if len(releases) < self.per_page:
+            return releases
+        if self.incremental and not self.full_reconcile and self.core_type is not None:
+            latest = await get_latest_sync_time("runtime", self.core_type)
+            # 第一页已经覆盖到数据库中最新的发布, 无需继续翻页
+            if latest is not None and (releases[-1].get("published_at") or "") <= latest:
+                return releases
+
+        last_page = parse_last_page(headers.get("Link"))
+        if last_page is not None:
+            pages = await gather(
+                *[
+                    get_json(self.page_link(page), headers=github_headers())
+                    for page in range(2, last_page + 1)
+                ]
+            )
+            # 缺页会让按位置编号的子类 (Luminol) 错位, 宁可跳过本次同步
+            if not all(isinstance(page_data, list) for page_data in pages):
+                SyncLogger.warning(f"{self.api_link} | Some release pages failed, skipped.")
+                return None
+            for page_data in pages:
+                releases.extend(page_data)
+        else:
+            page = 2
+            while True:
+                page_data = await get_json(self.page_link(page), headers=github_headers())
+                if not isinstance(page_data, list):
+                    # 超出最后一页时 GitHub 返回空列表, 这里只会是请求失败
+                    SyncLogger.warning(f"{self.api_link} | Release page {page} failed, skipped.")
+                    return None
+                releases.extend(page_data)
+                if len(page_data) < self.per_page:
+                    break
+                page += 1
+        return releases
+
+    async def fetch_releases_graphql(self) -> list[dict] | None:
+        result = await GitHubGraphQLLoader().load(self.owner, self.repo)
+        if result is None:
+            return None
+        releases, has_next_page = result
+        if has_next_page:
+            # 超出第一页时, 仅在增量模式且已覆盖数据库最新发布时可用, 否则回退到 REST 分页
+            if not self.incremental or self.full_reconcile or self.core_type is None:
+                return None
+            latest = await get_latest_sync_time("runtime", self.core_type)
+            if latest is None or (releases[-1].get("published_at") or "") > latest:
+                return None
+        return releases
+
     @SyncLogger.catch
     async def get_release_data(self) -> None:
-        tmp_data = await get_json(self.api_link)
+        tmp_data = None
+        if self.graphql and GitHubGraphQLLoader().available():
+            tmp_data = await self.fetch_releases_graphql()
+        if tmp_data is None:
+            tmp_data = await self.fetch_releases()
+        if tmp_data is None:
+            SyncLogger.warning(f"{self.api_link} | Release data unavailable, skipped.")
+            return
         for data in tmp_data:
             self.release_list.append(
                 {
@@ -0,0 +1,140 @@
+import sqlite3
+from hashlib import sha256
+from time import time
+from .logger import SyncLogger
+from .settings import cfg
+
+
+class CacheEntry(object):
+    def __init__(
+        self, etag: str | None, last_modified: str | None, digest: str, body: bytes
+    ) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.body = body
+
+
+class HTTPCache(object):
+    """
+    上游响应的磁盘缓存 (ETag / Last-Modified / 内容哈希)
+    超出容量上限时按最近访问时间淘汰
+    """
+
+    def __init__(self, path: str = "data/http_cache.db", max_size: int = 0) -> None:
+        self.path = path
+        self.max_size = max_size or int(cfg.get("http_cache_size_mb", 256)) * 1024 * 1024
+        self.connection: sqlite3.Connection | None = None
+        self.unchanged: set[str] = set()
+        self.hits: int = 0
+        self.revalidated: int = 0
+        self.misses: int = 0
+        self.evicted: int = 0
+        self._pending_writes: int = 0
+        self._last_commit: float = time()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    digest TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    last_access REAL
+                )
+                """
+            )
+        return self.connection
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        row = (
+            self.connect()
+            .execute(
+                "SELECT etag, last_modified, digest, body FROM responses WHERE url = ?",
+                (url,),
+            )
+            .fetchone()
+        )
+        return CacheEntry(*row) if row else None
+
+    def hit(self, url: str, entry: CacheEntry) -> bytes:
+        """服务端返回 304, 直接使用缓存内容"""
+        self.hits += 1
+        self.revalidated += 1
+        self.unchanged.add(url)
+        self._write(
+            "UPDATE responses SET last_access = ? WHERE url = ?", (time(), url)
+        )
+        return entry.body
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: str | None,
+        last_modified: str | None,
+        entry: CacheEntry | None,
+    ) -> None:
+        digest = sha256(body).hexdigest()
+        if entry is not None and entry.digest == digest:
+            # 上游没有校验头, 但内容与上次一致
+            self.hits += 1
+            self.unchanged.add(url)
+        else:
+            self.misses += 1
+            self.unchanged.discard(url)
+        self._write(
+            """
+            INSERT OR REPLACE INTO responses
+                (url, etag, last_modified, digest, body, size, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (url, etag, last_modified, digest, body, len(body), time()),
+        )
+
+    def is_unchanged(self, url: str) -> bool:
+        return url in self.unchanged
+
+    def _write(self, sql: str, parameters: tuple) -> None:
+        self.connect().execute(sql, parameters)
+        self._pending_writes += 1
+        # 分批提交, 同时限制崩溃时丢失的写入和运行期间的缓存大小
+        if self._pending_writes >= 100 or time() - self._last_commit >= 5:
+            self.evict()
+            self.connection.commit()
+            self._pending_writes = 0
+            self._last_commit = time()
+
+    def evict(self) -> None:
+        cursor = self.connect().execute(
+            """
+            DELETE FROM responses WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (ORDER BY last_access DESC) AS running_size
+                    FROM responses
+                )
+                WHERE running_size > ?
+            )
+            """,
+            (self.max_size,),
+        )
+        self.evicted += cursor.rowcount
+
+    def close(self) -> None:
+        if self.connection is None:
+            return
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
+        self._pending_writes = 0
+        SyncLogger.info(
+            f"HTTPCache | Hits: {self.hits} (304: {self.revalidated}), Misses: {self.misses}, Evicted: {self.evicted}"
+        )
@@ -1,8 +1,16 @@
 from .network import get_json
 from .logger import SyncLogger
+from .database import get_latest_build_number
+
+BUILD_TREE = "number,timestamp,status,result,artifacts[fileName,relativePath]"
 
 
 class JenkinsCISerializer:
+    # 为 True 时忽略数据库水位, 拉取完整构建历史 (--full-reconcile)
+    full_reconcile: bool = False
+    # 每次请求的构建数量, 对应 Jenkins tree 参数的 {m,n} 区间
+    window: int = 50
+
     def __init__(self, end_point: str):
         self.end_point = end_point
 
@@ -15,14 +23,86 @@ class JenkinsCISerializer:
         ]
 
     @SyncLogger.catch
-    async def load_single_job(self, job_name: str) -> list[dict[str, str]]:
-        tmp_builds = await get_json(
-            f"{self.end_point}/job/{job_name}/api/json?tree=builds[number,timestamp,status,result,artifacts[fileName,relativePath]]"
+    async def get_jobs_with_builds(self, depth: int | None = None) -> list[dict]:
+        """一次请求获取所有 Job 及其最近 depth 个构建"""
+        depth = depth or self.window
+        tmp_jobs = await get_json(
+            f"{self.end_point}/api/json?tree=jobs[name,url,builds[{BUILD_TREE}]{{0,{depth}}}]"
         )  # type: dict[str, str]
-        result = []
-        for build in tmp_builds["builds"]:
-            if build.get("result") == "SUCCESS":
-                result.append(
-                    {key: value for key, value in build.items() if key != "_class"}
-                )
+        return [
+            {key: value for key, value in job.items() if key != "_class"}
+            for job in tmp_jobs["jobs"]
+        ]
+
+    async def get_watermark(self, core_type: str, job_url: str) -> int | None:
+        """数据库中该 Job 已同步的最大构建号"""
+        if self.full_reconcile:
+            return None
+        return await get_latest_build_number("runtime", core_type, job_url)
+
+    async def fetch_builds(self, job_name: str, watermark: int | None) -> list[dict]:
+        if watermark is None:
+            tmp_builds = await get_json(
+                f"{self.end_point}/job/{job_name}/api/json?tree=builds[{BUILD_TREE}]"
+            )  # type: dict[str, str]
+            return tmp_builds["builds"]
+        # builds 按构建号降序排列, 逐个窗口向前翻页直到越过水位
+        builds = []
+        start = 0
+        while True:
+            tmp_builds = await get_json(
+                f"{self.end_point}/job/{job_name}/api/json?tree=builds[{BUILD_TREE}]{{{start},{start + self.window}}}"
+            )  # type: dict[str, str]
+            window_builds = tmp_builds["builds"]
+            builds.extend(
+                build for build in window_builds if build["number"] > watermark
+            )
+            if (
+                len(window_builds) < self.window
+                or window_builds[-1]["number"] <= watermark
+            ):
+                return builds
+            start += self.window
+
+    @staticmethod
+    def filter_builds(builds: list[dict]) -> list[dict[str, str]]:
+        return [
+            {key: value for key, value in build.items() if key != "_class"}
+            for build in builds
+            if build.get("result") == "SUCCESS"
+        ]
+
+    @staticmethod
+    def server_artifacts(artifacts: list[dict], key=None) -> list[dict]:
+        """
+        每个构建 (按 key 分组时为每组) 只保留一个服务端 jar, 跳过 sources / javadoc 等附属文件
+        数据库中每个 (core_type, mc_version, core_version) 只对应一个下载地址
+        """
+        selected: dict = {}
+        for artifact in artifacts:
+            group = key(artifact) if key else None
+            name = artifact.get("fileName", "")
+            is_server = name.endswith(".jar") and not any(
+                suffix in name for suffix in ("-sources", "-javadoc")
+            )
+            if group not in selected or (is_server and not selected[group][1]):
+                selected[group] = (artifact, is_server)
+        return [artifact for artifact, _ in selected.values()]
+
+    def covers_watermark(self, builds: list[dict], watermark: int | None) -> bool:
+        """get_jobs_with_builds 取回的窗口是否已包含水位之后的全部构建"""
+        if len(builds) < self.window:
+            return True
+        return watermark is not None and builds[-1]["number"] <= watermark
+
+    @SyncLogger.catch
+    async def load_single_job(
+        self, job_name: str, watermark: int | None = None
+    ) -> list[dict[str, str]]:
+        tmp_builds = await self.fetch_builds(job_name, watermark)
+        result = self.filter_builds(tmp_builds)
+        SyncLogger.info(
+            f"Jenkins | {job_name} | {len(result)} new builds"
+            + (f" after #{watermark}" if watermark is not None else " (full history)")
+        )
         return result
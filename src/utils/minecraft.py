@@ -1,3 +1,6 @@
+import re
+
+
 class MinecraftVersion(object):
     def __init__(self, version: str) -> None:
         self.version_str = version
@@ -48,6 +51,32 @@ class MinecraftVersion(object):
         return not self.__eq__(other)
 
 
+NUMBER_PATTERN = re.compile(r"\d+")
+SNAPSHOT_PATTERN = re.compile(r"^\d+w\d+[a-z]+$")
+
+
+def natural_sort_key(version: str | None) -> str:
+    """
+    可直接按字符串比较的版本排序键, 数字部分补零到固定宽度
+    例如 1.20.4 -> 0000000001.0000000020.0000000004!, build99 < build100
+    "-" / "_" 后缀 (pre / rc) 排在对应正式版之前, 周快照排在所有正式版之前
+
+    >>> versions = ["1.13", "24w14a", "1.13-pre7", "1.21-rc1", "1.13.1", "1.21", "1.9"]
+    >>> sorted(versions, key=natural_sort_key, reverse=True)
+    ['1.21', '1.21-rc1', '1.13.1', '1.13', '1.13-pre7', '1.9', '24w14a']
+    >>> releases = ["1.20.4", "1.8", "1.20", "1.12.2", "1.21.1", "1.7.10"]
+    >>> sorted(releases, key=natural_sort_key, reverse=True) == sort_versions_descending(releases)
+    True
+    """
+    version = str(version or "")
+    # 版本结尾的 "!" 大于后缀分隔符 " ", 小于 "."
+    key = NUMBER_PATTERN.sub(
+        lambda match: match.group(0).lstrip("0").rjust(10, "0"),
+        version.replace("-", " ").replace("_", " "),
+    ) + "!"
+    return " " + key if SNAPSHOT_PATTERN.match(version) else key
+
+
 def sort_versions_descending(versions: list[str]) -> list[str]:
     """
     对版本号列表进行降序排序
@@ -69,7 +98,8 @@ def sort_versions_descending(versions: list[str]) -> list[str]:
             # 尝试使用 MinecraftVersion 进行排序
             version_objects = [MinecraftVersion(v) for v in versions]
             sorted_objects = sorted(version_objects, reverse=True)
-            return [str(v) for v in sorted_objects]
+            # 返回原始字符串, str(MinecraftVersion) 会把 1.20 补全为 1.20.0
+            return [v.version_str for v in sorted_objects]
         except Exception:
             pass
     
@@ -1,7 +1,26 @@
-from aiohttp import ClientSession
+from asyncio import Condition, get_running_loop, sleep, TimeoutError as AsyncTimeoutError
+from email.utils import parsedate_to_datetime
+from random import uniform
+from time import localtime, perf_counter, strftime, time
+from urllib.parse import urlsplit
+from aiohttp import (
+    ClientConnectionError,
+    ClientPayloadError,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+    TraceConfig,
+)
+from multidict import CIMultiDict
 from .logger import __version__
 from .logger import SyncLogger
-from orjson import loads
+from .decorators import Singleton
+from .http_cache import HTTPCache
+from .settings import cfg
+from orjson import dumps, loads
+
+USER_AGENT = f"MCSLSync/{__version__} Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
 
 @SyncLogger.catch
 async def get_proxy() -> str | None:
@@ -15,62 +34,456 @@ async def get_proxy() -> str | None:
     return proxy
 
 
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableStatusError(Exception):
+    def __init__(self, link: str, status: int, retry_after: float | None) -> None:
+        super().__init__(f"HTTP {status} from {link}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+@Singleton
+class RetryPolicy(object):
+    """
+    统一的重试策略: 指数退避 + 抖动, 遵循 Retry-After
+    每个 host 在一次运行中的重试次数有上限, 耗尽后直接失败
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        host_budget: int = 60,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.host_budget = host_budget
+        self.retries: dict[str, int] = {}
+        self.failures: dict[str, int] = {}
+
+    @staticmethod
+    def is_retryable(exc: BaseException) -> bool:
+        return isinstance(
+            exc,
+            (
+                RetryableStatusError,
+                ClientConnectionError,
+                ClientPayloadError,
+                AsyncTimeoutError,
+            ),
+        )
+
+    def get_delay(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            # 超过 rate_limit_max_wait 的等待已在请求时转为 RateLimitExceeded
+            return retry_after
+        # full jitter
+        return uniform(0, min(self.base_delay * 2**attempt, self.max_delay))
+
+    async def run(self, link: str, func):
+        host = urlsplit(link).netloc
+        attempt = 0
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                attempt += 1
+                if (
+                    not self.is_retryable(e)
+                    or attempt >= self.max_attempts
+                    or self.retries.get(host, 0) >= self.host_budget
+                ):
+                    self.failures[host] = self.failures.get(host, 0) + 1
+                    raise
+                self.retries[host] = self.retries.get(host, 0) + 1
+                delay = self.get_delay(attempt, getattr(e, "retry_after", None))
+                SyncLogger.warning(
+                    f"Network | {host} | {e!r}, retrying in {delay:.1f}s ({attempt}/{self.max_attempts - 1})"
+                )
+                await sleep(delay)
+
+    def report(self) -> None:
+        for host in sorted(set(self.retries) | set(self.failures)):
+            SyncLogger.info(
+                f"Network | {host} | Retries: {self.retries.get(host, 0)}, Failed: {self.failures.get(host, 0)}"
+            )
+
+
+class HostLimiter(object):
+    """
+    单个 host 的自适应并发上限 (AIMD)
+    请求顺利时缓慢加一, 遇到 429/5xx/超时或延迟明显升高时减半
+    """
+
+    def __init__(
+        self,
+        host: str,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        slow_latency: float = 1.0,
+    ) -> None:
+        self.host = host
+        self.limit: float = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.slow_latency = slow_latency
+        self.in_flight: int = 0
+        self.peak: float = self.limit
+        self.requests: int = 0
+        self.backoffs: int = 0
+        self.base_latency: float | None = None
+        self._last_decrease: float = 0.0
+        self._condition = Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self, status: int | None, latency: float) -> None:
+        self.requests += 1
+        if self.base_latency is None or latency < self.base_latency:
+            self.base_latency = latency
+        congested = (
+            status is None
+            or status == 429
+            or status >= 500
+            or latency > max(self.slow_latency, self.base_latency * 4)
+        )
+        now = perf_counter()
+        if congested:
+            # 同一波拥塞只减一次
+            if now - self._last_decrease > latency:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self.backoffs += 1
+                self._last_decrease = now
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self.peak = max(self.peak, self.limit)
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def report(self) -> None:
+        SyncLogger.info(
+            f"Network | {self.host} | Concurrency limit: {int(self.limit)} (peak {int(self.peak)}), "
+            f"Requests: {self.requests}, Backoffs: {self.backoffs}"
+        )
+
+
+class RateLimitBudget(object):
+    """
+    根据 X-RateLimit-Remaining / X-RateLimit-Reset 安排请求 (GitHub 等)
+    额度紧张时拉开请求间隔, 耗尽时等待重置; 等待过久则推迟到下次运行
+    """
+
+    def __init__(self, host: str) -> None:
+        # host 或 "host (graphql)" 等, 仅用于日志
+        self.host = host
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset: float = 0.0
+        self.reserve: int = int(cfg.get("rate_limit_reserve", 5))
+        self.max_wait: float = float(cfg.get("rate_limit_max_wait", 300))
+        self.deferred: int = 0
+
+    async def acquire(self) -> None:
+        if self.remaining is None:
+            return
+        now = time()
+        if now >= self.reset:
+            # 新的额度窗口, 以下一次响应头为准
+            self.remaining = None
+            return
+        wait = 0.0
+        if self.remaining <= self.reserve:
+            wait = self.reset - now
+        elif self.limit and self.remaining < self.limit * 0.1:
+            wait = (self.reset - now) / (self.remaining - self.reserve)
+        if wait > self.max_wait:
+            self.deferred += 1
+            raise RateLimitExceeded(
+                f"{self.host} rate limit exhausted, resets in {self.reset - now:.0f}s"
+            )
+        self.remaining -= 1
+        if wait > 0:
+            await sleep(wait)
+
+    def reset_delay(self) -> float | None:
+        """距离额度重置的秒数, 尚未收到 X-RateLimit-Reset 时返回 None"""
+        if not self.reset:
+            return None
+        return max(self.reset - time(), 0.0) + 1
+
+    def update(self, headers) -> None:
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = float(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        self.limit = int(headers.get("X-RateLimit-Limit", 0)) or self.limit
+        if self.remaining is None or reset != self.reset:
+            self.remaining = remaining
+        else:
+            self.remaining = min(self.remaining, remaining)
+        self.reset = reset
+
+    def report(self) -> None:
+        if self.remaining is None and not self.deferred:
+            return
+        SyncLogger.info(
+            f"Network | {self.host} | Rate limit remaining: {self.remaining}/{self.limit}, "
+            f"resets at {strftime('%H:%M:%S', localtime(self.reset))}, Deferred: {self.deferred}"
+        )
+
+
+@Singleton
+class SessionManager(object):
+    """
+    整个同步过程共享的 ClientSession
+    按 host 复用 keep-alive 连接, 缓存 DNS, 代理只解析一次
+    """
+
+    def __init__(self) -> None:
+        self.session: ClientSession | None = None
+        self.proxy: str | None = None
+        self.opened_connections: int = 0
+        self.reused_connections: int = 0
+        self.cache: HTTPCache = HTTPCache()
+        self.limiters: dict[str, HostLimiter] = {}
+        self.budgets: dict[str, RateLimitBudget] = {}
+        self._loop = None
+
+    async def get_session(self) -> ClientSession:
+        loop = get_running_loop()
+        if self.session is None or self.session.closed or self._loop is not loop:
+            self.proxy = await get_proxy()
+            trace_config = TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            self.session = ClientSession(
+                connector=TCPConnector(
+                    limit=256,
+                    limit_per_host=64,
+                    ttl_dns_cache=600,
+                    keepalive_timeout=30,
+                ),
+                trust_env=isinstance(self.proxy, str),
+                timeout=ClientTimeout(total=60, sock_connect=15),
+                headers={"User-Agent": USER_AGENT},
+                trace_configs=[trace_config],
+            )
+            self.limiters = {}
+            self._loop = loop
+        return self.session
+
+    def get_limiter(self, host: str) -> HostLimiter:
+        if host not in self.limiters:
+            self.limiters[host] = HostLimiter(host)
+        return self.limiters[host]
+
+    def get_budget(self, link: str) -> RateLimitBudget:
+        """
+        每个 host 的每类接口各自计算额度
+        GitHub 的 REST 与 GraphQL 额度相互独立, 共用一个预算会让 update() 在两者之间来回切换
+        """
+        parts = urlsplit(link)
+        key = parts.netloc
+        if parts.path.rstrip("/").endswith("/graphql"):
+            key = f"{parts.netloc} (graphql)"
+        if key not in self.budgets:
+            self.budgets[key] = RateLimitBudget(key)
+        return self.budgets[key]
+
+    async def _on_connection_create(self, session, trace_config_ctx, params) -> None:
+        self.opened_connections += 1
+
+    async def _on_connection_reuse(self, session, trace_config_ctx, params) -> None:
+        self.reused_connections += 1
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        self._loop = None
+        self.cache.close()
+        RetryPolicy().report()
+        for limiter in self.limiters.values():
+            limiter.report()
+        for budget in self.budgets.values():
+            budget.report()
+        self.limiters = {}
+        SyncLogger.info(
+            f"Network | Connections opened: {self.opened_connections}, reused: {self.reused_connections}"
+        )
+
+
+async def get_session() -> ClientSession:
+    return await SessionManager().get_session()
+
+
+async def close_session() -> None:
+    await SessionManager().close()
+
+
+def is_unchanged(link: str) -> bool:
+    """
+    本次运行中 link 的响应是否与上次缓存的内容一致
+    缓存在写入数据库之前更新, 不代表数据库已包含这些数据
+    """
+    return SessionManager().cache.is_unchanged(link)
+
+
+async def fetch(link: str, headers: dict[str, str] | None = None) -> bytes | None:
+    return (await fetch_response(link, headers=headers))[0]
+
+
+async def fetch_response(
+    link: str, headers: dict[str, str] | None = None, payload: dict | None = None
+) -> tuple[bytes | None, CIMultiDict]:
+    """同 fetch, 额外返回响应头 (分页等场景); 给出 payload 时以 JSON POST 发送"""
+    return await RetryPolicy().run(link, lambda: _fetch_once(link, headers, payload))
+
+
+async def _fetch_once(
+    link: str, headers: dict[str, str] | None, payload: dict | None
+) -> tuple[bytes | None, CIMultiDict]:
+    session = await get_session()
+    host = urlsplit(link).netloc
+    await SessionManager().get_budget(link).acquire()
+    limiter = SessionManager().get_limiter(host)
+    await limiter.acquire()
+    status = None
+    start = perf_counter()
+    try:
+        body, status, response_headers = await _request(
+            session, link, dict(headers or {}), payload
+        )
+        return body, response_headers
+    finally:
+        await limiter.release(status, perf_counter() - start)
+
+
+async def _request(
+    session: ClientSession, link: str, headers: dict[str, str], payload: dict | None
+) -> tuple[bytes | None, int, CIMultiDict]:
+    cache = SessionManager().cache
+    budget = SessionManager().get_budget(link)
+    # 只缓存 GET 请求
+    entry = cache.lookup(link) if payload is None else None
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    if payload is None:
+        request = session.get(link, headers=headers)
+    else:
+        headers["Content-Type"] = "application/json"
+        request = session.post(link, headers=headers, data=dumps(payload))
+    async with request as response:
+        budget.update(response.headers)
+        if response.status == 304 and entry is not None:
+            return cache.hit(link, entry), response.status, CIMultiDict(response.headers)
+        rate_limited = (
+            response.status in (403, 429)
+            and response.headers.get("X-RateLimit-Remaining") == "0"
+        )
+        if response.status in RETRYABLE_STATUS or rate_limited:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None and rate_limited:
+                retry_after = budget.reset_delay()
+            if retry_after is not None and retry_after > budget.max_wait:
+                # 等不到额度重置, 推迟到下次运行
+                budget.deferred += 1
+                raise RateLimitExceeded(
+                    f"{budget.host} | HTTP {response.status}, retry after {retry_after:.0f}s exceeds rate_limit_max_wait"
+                )
+            raise RetryableStatusError(link, response.status, retry_after)
+        body = await response.read()
+        if response.status == 200 and payload is None:
+            cache.store(
+                link,
+                body,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                entry=entry,
+            )
+        return body, response.status, CIMultiDict(response.headers)
+
+
 @SyncLogger.catch
-async def get_json(link: str) -> dict | list | None:
+async def get_json(link: str, headers: dict[str, str] | None = None) -> dict | list | None:
     # print(link)
-    trust_env = bool(isinstance(await get_proxy(), str))
-    async with ClientSession(
-        trust_env=trust_env,
-        headers={
-            "User-Agent": f"MCSLSync/{__version__} Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        },
-    ) as session:
-        async with session.get(link) as response:
-            return loads(await response.text())
+    body = await fetch(link, headers=headers)
+    return loads(body) if body is not None else None
+
+
+@SyncLogger.catch
+async def get_json_response(
+    link: str, headers: dict[str, str] | None = None
+) -> tuple[dict | list | None, CIMultiDict] | None:
+    body, response_headers = await fetch_response(link, headers=headers)
+    return (loads(body) if body is not None else None), response_headers
 
 
 @SyncLogger.catch
-async def get_text(link: str) -> str | None:
-    trust_env = bool(isinstance(await get_proxy(), str))
-    async with ClientSession(
-        trust_env=trust_env,
-        headers={
-            "User-Agent": f"MCSLSync/{__version__} Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        },
-    ) as session:
-        async with session.get(link) as response:
+async def post_json(
+    link: str, payload: dict, headers: dict[str, str] | None = None
+) -> dict | list | None:
+    body, _ = await fetch_response(link, headers=headers, payload=payload)
+    return loads(body) if body is not None else None
+
+
+@SyncLogger.catch
+async def get_text(link: str, headers: dict[str, str] | None = None) -> str | None:
+    content = await fetch(link, headers=headers)
+    if content is None:
+        return None
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        # Try common encodings if UTF-8 fails
+        for encoding in ['latin1', 'cp1252', 'iso-8859-1']:
             try:
-                return await response.text()
+                return content.decode(encoding)
             except UnicodeDecodeError:
-                # Try different encodings if UTF-8 fails
-                try:
-                    content = await response.read()
-                    # Try common encodings
-                    for encoding in ['latin1', 'cp1252', 'iso-8859-1']:
-                        try:
-                            return content.decode(encoding)
-                        except UnicodeDecodeError:
-                            continue
-                    # If all encodings fail, use errors='ignore'
-                    return content.decode('utf-8', errors='ignore')
-                except Exception as e:
-                    SyncLogger.warning(f"Failed to decode response from {link}: {e}")
-                    return None
+                continue
+        # If all encodings fail, use errors='ignore'
+        return content.decode('utf-8', errors='ignore')
 
 
 async def check_file_exists(uri: str):
-    async with ClientSession(
-        trust_env=not bool(isinstance(await get_proxy(), str)),
-        headers={
-            "User-Agent": f"MCSLSync/{__version__} Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        },
-    ) as session:
-        async with session.head(
-            uri, allow_redirects=True, max_redirects=10
-        ) as head_response:
-            if head_response.status in [302, 307]:
-                redirect_uri = head_response.headers.get("Location")
-                return await check_file_exists(redirect_uri)
-            else:
-                print(head_response.status)
-                return True if not head_response.status != 404 else False
+    session = await get_session()
+    async with session.head(
+        uri, allow_redirects=True, max_redirects=10
+    ) as head_response:
+        if head_response.status in [302, 307]:
+            redirect_uri = head_response.headers.get("Location")
+            return await check_file_exists(redirect_uri)
+        else:
+            print(head_response.status)
+            return True if not head_response.status != 404 else False
@@ -13,6 +13,17 @@ config_template = {
     "ssl_cert_path": "",
     "ssl_key_path": "",
     "node_list": [],
+    "http_cache_size_mb": 256,
+    "github_token": "",
+    "github_graphql_endpoint": "",
+    "catalog_database": False,
+    "database_workers": 4,
+    "response_cache_entries": 4096,
+    "cache_max_age": 60,
+    "compression_min_size": 1024,
+    "production_generations": 3,
+    "retention": {"default": {"keep_builds": 35, "keep_days": 0}},
+    "change_journal_days": 30,
     "secret_key": "".join(
         [
             md5(
@@ -48,7 +59,7 @@ def read_settings() -> dict:
         return cfg
     except FileNotFoundError:
         init_settings()
-        read_settings()
+        return read_settings()
 
 
 cfg = read_settings()